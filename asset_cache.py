@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+import pygame as pg
+from settings import *
+
+MAGIC = b'P3DASSET'
+VERSION = 1
+HEADER = struct.Struct('<8sII')  # assinatura, versão, tamanho do índice em bytes
+ALIGNMENT = 16
+
+
+class AssetCache:
+    """Cache em disco das imagens já decodificadas e escaladas, num arquivo único.
+
+    O arquivo tem um cabeçalho, um índice JSON e os pixels RGBA crus de cada entrada. A entrada é
+    chaveada pelo caminho, tamanho final e tipo de escala, e guarda o hash do arquivo de origem:
+    se a origem mudar, a entrada fica velha, a imagem é refeita e o arquivo é regravado em save().
+    A leitura é por mmap, sem decodificar PNG.
+    """
+    def __init__(self, path=ASSET_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.data = None
+        self.index = {}
+        self.pending = {}  # chave -> (entrada, pixels) ainda não gravados
+        self.source_hashes = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.open()
+
+    @staticmethod
+    def get_key(path, size, smooth):
+        if size is None:
+            return path
+        return f"{path}|{size[0]}x{size[1]}|{'smoothscale' if smooth else 'scale'}"
+
+    def open(self):
+        self.close()
+        if not os.path.exists(self.path):
+            return
+        self.file = open(self.path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_size = HEADER.unpack_from(self.data)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'formato de cache desconhecido: {self.path}')
+            self.index = json.loads(self.data[HEADER.size:HEADER.size + index_size])
+        except (ValueError, struct.error) as error:
+            # cache corrompido ou de outra versão: começa vazio e é refeito no próximo save
+            print(f'Cache de assets ignorado ({error})')
+            self.close()
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        if self.file is not None:
+            self.file.close()
+        self.file, self.data, self.index = None, None, {}
+
+    def get_source_hash(self, path):
+        source_hash = self.source_hashes.get(path)
+        if source_hash is None:
+            with open(path, 'rb') as file:
+                source_hash = hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+            self.source_hashes[path] = source_hash
+        return source_hash
+
+    def get(self, path, size=None, smooth=False):
+        """Superfície RGBA da entrada, ou None se ela não existe ou a origem mudou"""
+        key = self.get_key(path, size, smooth)
+        entry = self.index.get(key)
+        if entry is None or entry['hash'] != self.get_source_hash(path):
+            with self.lock:
+                self.misses += 1
+                self.stale += entry is not None
+            return None
+        with self.lock:
+            self.hits += 1
+        width, height = entry['size']
+        start = entry['offset']
+        # copia os pixels para fora do mmap, para o arquivo poder ser regravado com as superfícies vivas
+        pixels = self.data[start:start + width * height * 4]
+        return pg.image.frombuffer(pixels, (width, height), 'RGBA')
+
+    def put(self, path, size, smooth, image):
+        entry = {'path': path, 'target': list(size) if size else None, 'smooth': smooth,
+                 'hash': self.get_source_hash(path), 'size': list(image.get_size())}
+        with self.lock:
+            self.pending[self.get_key(path, size, smooth)] = entry, pg.image.tobytes(image, 'RGBA')
+
+    def get_requests(self):
+        """(caminho, tamanho, suave) de cada entrada: o que a última execução usou"""
+        return [(entry['path'], tuple(entry['target']) if entry['target'] else None, entry['smooth'])
+                for entry in self.index.values()]
+
+    @property
+    def dirty(self):
+        return bool(self.pending)
+
+    def save(self):
+        """Regrava o arquivo com as entradas ainda válidas e as novas; as de origens alteradas saem"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        entries = {}
+        for key, entry in self.index.items():
+            path = entry['path']
+            if key not in pending and os.path.exists(path) and entry['hash'] == self.get_source_hash(path):
+                start = entry['offset']
+                width, height = entry['size']
+                entries[key] = dict(entry), self.data[start:start + width * height * 4]
+        entries.update(pending)
+
+        # os deslocamentos dependem do tamanho do índice, que depende dos deslocamentos: o índice é
+        # serializado com espaço de sobra até estabilizar
+        index_size = 0
+        while True:
+            offset = -(-(HEADER.size + index_size) // ALIGNMENT) * ALIGNMENT
+            index = {}
+            for key, (entry, pixels) in entries.items():
+                index[key] = dict(entry, offset=offset)
+                offset += -(-len(pixels) // ALIGNMENT) * ALIGNMENT
+            index_bytes = json.dumps(index, separators=(',', ':')).encode()
+            if len(index_bytes) <= index_size:
+                break
+            index_size = len(index_bytes) + 256
+
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+            file.write(index_bytes)
+            for key, (entry, pixels) in entries.items():
+                file.seek(index[key]['offset'])
+                file.write(pixels)
+        self.close()
+        os.replace(temp_path, self.path)
+        self.open()
+        return len(entries)
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'entries': len(self.index),
+            'bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cache em disco dos assets pré-processados')
+    parser.add_argument('command', choices=['build', 'info', 'clear'])
+    parser.add_argument('--path', default=ASSET_CACHE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'clear':
+        if os.path.exists(args.path):
+            os.remove(args.path)
+        return
+
+    if args.command == 'info':
+        cache = AssetCache(args.path)
+        stale = sum(not os.path.exists(entry['path']) or entry['hash'] != cache.get_source_hash(entry['path'])
+                    for entry in cache.index.values())
+        print(json.dumps(dict(cache.get_stats(), stale=stale), indent=2))
+        return
+
+    # o build inicia o jogo sem janela, o que pede exatamente os assets (e tamanhos) da inicialização
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    from main import Game
+    game = Game(args.path)
+    # inclui as pastas que o preload pula e que o jogo só pede no meio da partida, como as animações de morte
+    for directory in ASSET_PRELOAD_DIRS:
+        for root, dirs, files in os.walk(directory):
+            if os.path.basename(root) in ASSET_LAZY_DIRS:
+                game.assets.load_images(root.replace(os.sep, '/'))
+    for handle in list(game.assets.handles.values()):
+        handle.get()
+    game.assets.save_cache()
+    print(json.dumps(game.assets.disk_cache.get_stats(), indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame as pg
+from settings import *
+from asset_cache import AssetCache
+
+IMAGE_EXTENSIONS = ('.png',)
+SOUND_EXTENSIONS = ('.wav',)
+
+
+class AssetHandle:
+    """Asset pedido ao AssetManager.
+
+    O arquivo é decodificado (e escalado) numa thread do pool; a etapa final, como o convert_alpha,
+    precisa da thread principal e roda na primeira chamada de get(), que só bloqueia se a
+    decodificação ainda não terminou.
+    """
+    def __init__(self, manager, key, name, future, finish):
+        self.manager = manager
+        self.key = key
+        self.name = name
+        self.future = future
+        self.finish = finish
+        self.value = None
+        self.ready = False
+
+    def done(self):
+        return self.ready or self.future.done()
+
+    def get(self):
+        if not self.ready:
+            self.value = self.manager.resolve(self)
+            self.ready = True
+        return self.value
+
+
+class AssetManager:
+    """Carrega imagens e sons em paralelo num pool de threads, uma vez por arquivo.
+
+    Os handles ficam guardados por caminho, então um novo jogo ou um inimigo recém-criado reaproveita
+    as superfícies já convertidas. Com o cache em disco, as imagens já escaladas vêm dele sem
+    decodificar PNG. O relatório separa o tempo de decodificação nas threads, a etapa final na
+    thread principal e quanto a thread principal ficou esperando.
+    """
+    def __init__(self, workers=ASSET_WORKERS, cache_path=ASSET_CACHE_PATH):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assets')
+        self.disk_cache = AssetCache(cache_path) if cache_path else None
+        self.lock = threading.Lock()
+        self.decoded = {}  # (tipo, caminho, tamanho, suave) -> future do arquivo decodificado
+        self.handles = {}  # (tipo, caminho, tamanho, suave) -> AssetHandle
+        self.decode_times = {}  # chave -> segundos na thread do pool
+        self.uncached = set()  # imagens que não vieram do cache em disco e entram nele quando usadas
+        self.finish_time = 0
+        self.wait_time = 0
+        self.start_time = time.perf_counter()
+        self.startup_time = None
+
+    def decode(self, key, loader, *args):
+        with self.lock:
+            future = self.decoded.get(key)
+            if future is None:
+                future = self.decoded[key] = self.executor.submit(self.timed_decode, key, loader, *args)
+        return future
+
+    def timed_decode(self, key, loader, *args):
+        start = time.perf_counter()
+        value = loader(*args)
+        with self.lock:
+            self.decode_times[key] = time.perf_counter() - start
+        return value
+
+    def resolve(self, handle):
+        start = time.perf_counter()
+        decoded = handle.future.result()
+        finish_start = time.perf_counter()
+        self.wait_time += finish_start - start
+        value = handle.finish(decoded)
+        # só vai para o disco o que o jogo realmente usa, não tudo que foi pré-carregado
+        if handle.key in self.uncached:
+            self.disk_cache.put(*handle.key[1:], decoded)
+        self.finish_time += time.perf_counter() - finish_start
+        return value
+
+    def get_handle(self, key, name, loader, finish, *args):
+        handle = self.handles.get(key)
+        if handle is None:
+            handle = self.handles[key] = AssetHandle(self, key, name, self.decode(key, loader, *args), finish)
+        return handle
+
+    def load_image(self, path, size=None, smooth=False):
+        size = tuple(map(int, size)) if size else None
+        key = ('image', path, size, smooth)
+        return self.get_handle(key, path, self.read_image, pg.Surface.convert_alpha, path, size, smooth)
+
+    def read_image(self, path, size, smooth):
+        """Roda no pool: lê a imagem pronta do cache em disco ou decodifica o PNG e escala"""
+        cache = self.disk_cache
+        image = cache.get(path, size, smooth) if cache else None
+        if image is not None:
+            return image
+        if size is None:
+            image = pg.image.load(path)
+            # RGBA de 32 bits, o mesmo formato das entradas do cache e aceito pelo smoothscale
+            image = pg.image.frombuffer(pg.image.tobytes(image, 'RGBA'), image.get_size(), 'RGBA')
+        else:
+            # a versão original só é esperada se já está sendo decodificada; na fila, ela é lida aqui mesmo
+            with self.lock:
+                source = self.decoded.get(('image', path, None, False))
+            if source is not None and (source.running() or source.done()):
+                source = source.result()
+            else:
+                source = self.read_image(path, None, False)
+            image = (pg.transform.smoothscale if smooth else pg.transform.scale)(source, size)
+        if cache:
+            with self.lock:
+                self.uncached.add(('image', path, size, smooth))
+        return image
+
+    def load_images(self, directory, size=None, smooth=False):
+        """Handles dos quadros de uma animação, na ordem dos nomes dos arquivos"""
+        file_names = sorted(f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f)))
+        return [self.load_image(directory + '/' + file_name, size, smooth) for file_name in file_names]
+
+    def load_sound(self, path):
+        if not pg.mixer.get_init():
+            pg.mixer.init()
+        return self.get_handle(('sound', path, None, False), path, pg.mixer.Sound, lambda sound: sound, path)
+
+    def load_music(self, path):
+        """A música só é aberta quando pedida; get() deixa ela pronta para pg.mixer.music.play"""
+        key = ('music', path, None, False)
+        handle = self.handles.get(key)
+        if handle is None:
+            # pg.mixer.music é um estado global do SDL_mixer: nada vai para o pool, e o load roda
+            # na thread principal, na primeira chamada de get()
+            future = Future()
+            future.set_result(path)
+            handle = self.handles[key] = AssetHandle(self, key, path, future, self.open_music)
+        return handle
+
+    @staticmethod
+    def open_music(path):
+        if not pg.mixer.get_init():
+            pg.mixer.init()
+        pg.mixer.music.load(path)
+        return path
+
+    def preload(self, *directories):
+        """Começa a decodificar as imagens e sons das pastas antes de alguém pedir por eles.
+
+        Com o cache em disco, as imagens pré-carregadas são as que a última execução usou, já no
+        tamanho final; sem ele, são todas as imagens das pastas, menos as de ASSET_LAZY_DIRS, que
+        só são decodificadas quando alguém pede por elas.
+        """
+        requests = self.disk_cache.get_requests() if self.disk_cache else []
+        # só a decodificação começa; os handles continuam sendo criados por quem usa o asset
+        for path, size, smooth in requests:
+            if os.path.exists(path):
+                self.decode(('image', path, size, smooth), self.read_image, path, size, smooth)
+        for directory in directories:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = sorted(name for name in dirs if name not in ASSET_LAZY_DIRS)
+                for file_name in sorted(files):
+                    path = root.replace(os.sep, '/') + '/' + file_name
+                    if file_name.endswith(IMAGE_EXTENSIONS) and not requests:
+                        self.decode(('image', path, None, False), self.read_image, path, None, False)
+                    elif file_name.endswith(SOUND_EXTENSIONS):
+                        self.load_sound(path)
+
+    def mark_startup(self):
+        if self.startup_time is None:
+            self.startup_time = time.perf_counter() - self.start_time
+
+    def get_report(self):
+        with self.lock:
+            decode_times = dict(self.decode_times)
+        slowest = sorted(decode_times.items(), key=lambda item: item[1], reverse=True)[:5]
+        slowest = [(self.get_key_name(key), seconds) for key, seconds in slowest]
+        return {
+            'workers': self.workers,
+            'files_decoded': len(decode_times),
+            'files_pending': sum(not future.done() for future in self.decoded.values()),
+            'startup_s': self.startup_time,
+            'decode_s': sum(decode_times.values()),
+            'main_thread_finish_s': self.finish_time,
+            'main_thread_wait_s': self.wait_time,
+            'slowest': {name: seconds for name, seconds in slowest},
+            'disk_cache': self.disk_cache.get_stats() if self.disk_cache else None,
+        }
+
+    @staticmethod
+    def get_key_name(key):
+        kind, path, size, smooth = key
+        return AssetCache.get_key(path, size, smooth) if kind == 'image' else path
+
+    def print_report(self):
+        report = self.get_report()
+        print(f"Assets: {report['files_decoded']} arquivos em {report['workers']} threads, "
+              f"inicialização {report['startup_s']:.3f}s")
+        print(f"  decodificação (threads) {report['decode_s']:.3f}s, etapa final {report['main_thread_finish_s']:.3f}s, "
+              f"espera {report['main_thread_wait_s']:.3f}s")
+        if report['disk_cache']:
+            cache = report['disk_cache']
+            print(f"  cache em disco: {cache['hits']} acertos, {cache['misses']} faltas ({cache['stale']} desatualizadas)")
+        for path, seconds in report['slowest'].items():
+            print(f"  {seconds * 1000:7.1f} ms  {path}")
+
+    def wait(self):
+        with self.lock:
+            futures = list(self.decoded.values())
+        for future in futures:
+            future.exception()
+
+    def save_cache(self):
+        """Grava no disco o que foi decodificado fora do cache; espera o pool terminar antes"""
+        if self.disk_cache and self.disk_cache.dirty:
+            self.wait()
+            self.disk_cache.save()
+
+    def shutdown(self):
+        self.save_cache()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,47 @@
+import pygame as pg
+import numpy as np
+
+
+class BackgroundLayer:
+    """Fundo pré-composto (céu + chão) com o céu repetido lado a lado para dar a volta.
+
+    A faixa é montada uma vez e só é refeita quando a resolução ou a textura do céu mudam;
+    a cada quadro o fundo sai de um único blit, ou de uma única cópia de array.
+    """
+    def __init__(self, sky_image, floor_color):
+        self.sky_image = sky_image
+        self.floor_color = floor_color
+        self.strip = None
+        self.pixels = None
+        self.key = None
+
+    def set_sky(self, sky_image):
+        self.sky_image = sky_image
+
+    def build(self, screen):
+        width, height = screen.get_size()
+        sky = pg.transform.scale(self.sky_image, (width, height // 2))
+        self.strip = pg.Surface((2 * width, height)).convert(screen)
+        self.strip.blit(sky, (0, 0))
+        self.strip.blit(sky, (width, 0))
+        self.strip.fill(self.floor_color, (0, height // 2, 2 * width, height - height // 2))
+        # pixels [x, y] da faixa no formato da tela, para a cópia direta no framebuffer
+        self.pixels = pg.surfarray.array2d(self.strip).astype(np.uint32)
+        self.key = (width, height, self.sky_image)
+
+    def check_build(self, screen):
+        width, height = screen.get_size()
+        if self.key != (width, height, self.sky_image):
+            self.build(screen)
+
+    def draw(self, screen, offset):
+        self.check_build(screen)
+        width, height = screen.get_size()
+        screen.blit(self.strip, (0, 0), (int(offset) % width, 0, width, height))
+
+    def copy_to(self, screen, pixels, offset):
+        """Limpa um array de pixels [x, y] da tela com o fundo, no lugar de draw"""
+        self.check_build(screen)
+        width = screen.get_width()
+        start = int(offset) % width
+        pixels[...] = self.pixels[start:start + width]
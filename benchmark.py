@@ -0,0 +1,249 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+# sem a mensagem de boas-vindas do pygame, para a saída padrão conter só o JSON
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame as pg
+from settings import *
+from controls import Controls
+from sprite_object import SpriteObject
+from strip_pool import StripPool
+
+# ações de entrada disponíveis nas linhas do tempo dos cenários
+ACTION_KEYS = {
+    'forward': pg.K_w,
+    'back': pg.K_s,
+    'strafe_left': pg.K_a,
+    'strafe_right': pg.K_d,
+    'turn_left': pg.K_LEFT,
+    'turn_right': pg.K_RIGHT,
+}
+
+# cada cenário define a pose inicial, quantos inimigos existem e uma linha do tempo de
+# (quadro inicial, quadro final, ação); 'fire' dispara uma vez no quadro inicial
+SCENARIOS = {
+    'corridor': {
+        'description': 'Corredor vazio, andando para frente',
+        'frames': 300,
+        'player_pos': (1.5, 8.5),
+        'player_angle': 0.0,
+        'enemies': 0,
+        'timeline': [(0, 300, 'forward')],
+    },
+    'max_enemies': {
+        'description': 'Mapa com o máximo de inimigos, andando, virando e atirando',
+        'frames': 300,
+        'player_pos': (12.5, 8.5),
+        'player_angle': 0.0,
+        'enemies': 'max',
+        'timeline': [(0, 100, 'forward'), (100, 200, 'turn_right'), (200, 300, 'strafe_left')] +
+                    [(frame, frame + 1, 'fire') for frame in range(0, 300, 30)],
+    },
+    'open_floor': {
+        'description': 'Sala comprida com muito piso à vista, andando e virando devagar',
+        'frames': 300,
+        'player_pos': (21.5, 19.5),
+        'player_angle': 0.0,
+        'enemies': 0,
+        'timeline': [(0, 150, 'forward'), (150, 300, 'turn_left')],
+    },
+    'spin': {
+        'description': 'Giro completo de 360 graus parado no lugar',
+        'frames': 220,
+        'player_pos': (12.5, 5.5),
+        'player_angle': 0.0,
+        'enemies': 0,
+        'timeline': [(0, 220, 'turn_right')],
+    },
+}
+
+
+class KeyState:
+    """Substituto de pg.key.get_pressed() com um conjunto fixo de teclas pressionadas"""
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class ScriptedControls(Controls):
+    """Entrada roteirizada: teclas, mouse e disparos vêm da linha do tempo do cenário"""
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.frame = 0
+
+    def get_actions(self):
+        return [action for start, end, action in self.timeline if start <= self.frame < end]
+
+    def get_events(self):
+        events = pg.event.get()
+        if any(start == self.frame and action == 'fire' for start, end, action in self.timeline):
+            events.append(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(HALF_WIDTH, HALF_HEIGHT)))
+        return events
+
+    def get_pressed(self):
+        return KeyState({ACTION_KEYS[action] for action in self.get_actions() if action in ACTION_KEYS})
+
+    def get_mouse_rel(self):
+        return 0
+
+
+class BenchmarkRunner:
+    """Roda o jogo sem janela, de forma determinística e sem limite de FPS, medindo cada quadro"""
+    def __init__(self, scenario_name, frames=None, seed=0, simulate=False, quality=0, workers=RAYCAST_WORKERS,
+                 floor_texture=None):
+        self.scenario_name = scenario_name
+        self.scenario = SCENARIOS[scenario_name]
+        self.frames = frames or self.scenario['frames']
+        self.seed = seed
+        self.simulate = simulate
+        self.quality = quality
+        self.workers = workers
+        self.floor_texture = floor_texture
+        self.game = None
+        self.controls = ScriptedControls(self.scenario['timeline'])
+
+    def setup(self):
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        random.seed(self.seed)
+
+        from main import Game
+        self.game = Game()
+        self.game.controls = self.controls
+        # nível de qualidade fixo: o controlador dinâmico não roda fora de Game.run
+        self.game.render_config.set_level(self.quality)
+        if self.workers != self.game.strip_pool.workers:
+            self.game.strip_pool.shutdown()
+            self.game.strip_pool = StripPool(self.workers)
+        if self.floor_texture:
+            # piso texturizado só nesta medição, sem mudar o padrão de settings
+            renderer = self.game.object_renderer
+            renderer.floor = renderer.get_floor_caster(self.floor_texture)
+
+        player = self.game.player
+        player.x, player.y = self.scenario['player_pos']
+        player.angle = self.scenario['player_angle']
+        # o jogador não morre durante a medição
+        player.health = 10 ** 6
+
+        handler = self.game.object_handler
+        # a quantidade de inimigos é fixada pelo cenário, sem spawn por tempo
+        handler.spawn_delay = float('inf')
+        enemies = handler.max_enemies if self.scenario['enemies'] == 'max' else self.scenario['enemies']
+        if not enemies:
+            for npc in handler.npc_list:
+                handler.spatial_index.remove(npc)
+            handler.npc_list.clear()
+        for _ in range(handler.max_enemies * 4):
+            if len(handler.spatial_index) >= enemies:
+                break
+            handler.force_spawn()
+
+    def run(self):
+        self.setup()
+        game = self.game
+        profiler = game.profiler
+        profiler.set_enabled(True)
+        game.fps_limit = 0
+        frame_times = np.zeros(self.frames)
+
+        # um passo fixo de simulação por quadro; sem renderização no modo simulate
+        for frame in range(self.frames):
+            self.controls.frame = frame
+            frame_start = time.perf_counter_ns()
+            game.check_events()
+            game.update()
+            if not self.simulate:
+                game.draw()
+            profiler.end_frame()
+            frame_times[frame] = (time.perf_counter_ns() - frame_start) / 1e6
+
+        return self.get_report(frame_times, profiler.totals)
+
+    def get_report(self, frame_times, totals):
+        game = self.game
+        return {
+            'scenario': self.scenario_name,
+            'frames': self.frames,
+            'simulate': self.simulate,
+            'seed': self.seed,
+            'resolution': list(RESOLUTION),
+            'num_rays': game.render_config.num_rays,
+            'render': game.render_config.get_report(),
+            'raycaster': game.raycasting.raycaster,
+            'wall_renderer': game.object_renderer.wall_renderer,
+            'raycast_workers': game.strip_pool.workers,
+            'floor': self.get_floor_report(),
+            'enemies': len(game.object_handler.spatial_index),
+            'frame_ms': {
+                'mean': float(frame_times.mean()),
+                'p50': float(np.percentile(frame_times, 50)),
+                'p90': float(np.percentile(frame_times, 90)),
+                'p95': float(np.percentile(frame_times, 95)),
+                'p99': float(np.percentile(frame_times, 99)),
+                'max': float(frame_times.max()),
+            },
+            'fps_mean': float(1000 / frame_times.mean()),
+            'subsystems_ms': {name: total / 1e6 for name, total in totals.items()},
+            'assets': game.assets.get_report(),
+            'caches': {
+                'wall_columns': game.raycasting.column_cache.get_stats(),
+                'sprites': SpriteObject.scale_cache.get_stats(),
+            },
+        }
+
+    def get_floor_report(self):
+        renderer = self.game.object_renderer
+        if renderer.floor is None:
+            return None
+        return {
+            'step': renderer.floor.step,
+            'ceiling': renderer.floor.ceiling is not None,
+            # limite do custo por quadro e o quanto o último quadro realmente calculou
+            'max_texels': renderer.floor.get_max_texels(self.game.render_config),
+            'last_texels': renderer.floor_texels,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark sem janela do loop do jogo')
+    parser.add_argument('scenario', nargs='?', default='corridor', choices=sorted(SCENARIOS))
+    parser.add_argument('--frames', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--simulate', action='store_true', help='só a simulação, sem renderizar')
+    parser.add_argument('--quality', type=int, default=0, help='nível de QUALITY_LEVELS, 0 = resolução da janela')
+    parser.add_argument('--workers', type=int, default=RAYCAST_WORKERS, help='threads do raycast em faixas')
+    parser.add_argument('--floor', nargs='?', const='textures/noblood_wall.png', default=FLOOR_TEXTURE,
+                        help='textura do piso texturizado (sem valor, uma textura de parede)')
+    parser.add_argument('--output', help='arquivo onde salvar o relatório JSON')
+    parser.add_argument('--list', action='store_true', help='lista os cenários disponíveis')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, scenario in sorted(SCENARIOS.items()):
+            print(f"{name}: {scenario['description']}")
+        return
+
+    # mensagens do jogo vão para stderr, deixando stdout só com o JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = BenchmarkRunner(args.scenario, args.frames, args.seed, args.simulate, args.quality, args.workers,
+                                 args.floor).run()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class SurfaceCache:
+    """Cache LRU de superfícies limitado pela memória ocupada pelos pixels"""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_surface_size(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get(self, key):
+        surface = self.entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        if key in self.entries:
+            self.size -= self.get_surface_size(self.entries.pop(key))
+        self.entries[key] = surface
+        self.size += self.get_surface_size(surface)
+        # descarta as entradas menos usadas recentemente até caber no limite
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= self.get_surface_size(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def get_stats(self):
+        """Retorna os contadores do cache, úteis para ajustar a quantização"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
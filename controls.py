@@ -0,0 +1,17 @@
+import pygame as pg
+from settings import *
+
+
+class Controls:
+    """Entrada ao vivo do jogador: fila de eventos, teclado e mouse do pygame"""
+    def get_events(self):
+        return pg.event.get()
+
+    def get_pressed(self):
+        return pg.key.get_pressed()
+
+    def get_mouse_rel(self):
+        mx, my = pg.mouse.get_pos()
+        if mx < MOUSE_BORDER_LEFT or mx > MOUSE_BORDER_RIGHT:
+            pg.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
+        return pg.mouse.get_rel()[0]
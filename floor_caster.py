@@ -0,0 +1,85 @@
+import numpy as np
+from settings import *
+
+
+class FloorCaster:
+    """Piso e teto texturizados projetados para a metade inferior (e superior) da visão inteira.
+
+    As tabelas que só dependem da resolução, a distância de cada linha e o ângulo de cada coluna
+    em relação ao jogador, são calculadas uma vez por RenderConfig. A cada quadro só a direção de
+    cada coluna muda com o ângulo do jogador, e o ponto do chão de cada pixel sai do produto externo
+    linhas x colunas. Com step > 1 um texel cobre um bloco step x step de pixels, e o custo do quadro
+    fica limitado a get_max_texels().
+    """
+    def __init__(self, floor_texture, ceiling_texture=None, step=FLOOR_CAST_STEP):
+        # texturas como arrays [x, y] no formato de pixel da visão, lineares para o take
+        self.texture_size = floor_texture.shape[0]
+        self.floor = floor_texture.ravel()
+        self.ceiling = ceiling_texture.ravel() if ceiling_texture is not None else None
+        self.step = step
+        self.key = None
+
+    def check_tables(self, config):
+        if self.key == (config.revision, self.step):
+            return
+        self.key = config.revision, self.step
+        step = self.step
+        # cada amostra fica no centro do seu bloco de pixels
+        rows = np.arange(config.half_height, config.height, step) + step / 2 - config.half_height
+        self.row_distances = (config.screen_dist / (2 * rows)).astype(np.float32)
+        columns = np.arange(0, config.width, step) + step / 2
+        # o mesmo modelo angular dos raios: a coluna x fica no ângulo do raio x / scale
+        self.column_angles = -HALF_FOV + 0.0001 + columns / config.scale * config.delta_angle
+        # a distância da linha é perpendicular; ao longo do raio ela cresce por 1 / cos
+        self.column_stretch = 1 / np.cos(self.column_angles)
+
+    def get_max_texels(self, config):
+        columns = -(-config.width // self.step)
+        rows = -(-(config.height - config.half_height) // self.step)
+        return columns * rows * (2 if self.ceiling is not None else 1)
+
+    def get_columns(self):
+        return len(self.column_angles)
+
+    def draw(self, pixels, config, player, first_row, start=0, end=None):
+        """Escreve o piso (e o teto) nas colunas de amostra [start, end) de pixels (altura, largura).
+
+        Linhas acima de first_row na metade inferior, e o espelho delas no teto, ficam de fora:
+        estão cobertas pelas paredes em todas as colunas. Devolve quantos texels foram calculados.
+        """
+        self.check_tables(config)
+        step, size = self.step, self.texture_size
+        end = self.get_columns() if end is None else end
+        first_block = max(first_row - config.half_height, 0) // step
+        distances = self.row_distances[first_block:, None]
+        if not len(distances) or start >= end:
+            return 0
+
+        angles = player.angle + self.column_angles[start:end]
+        stretch = self.column_stretch[start:end]
+        dir_x = (np.cos(angles) * stretch).astype(np.float32)
+        dir_y = (np.sin(angles) * stretch).astype(np.float32)
+
+        # ponto do chão de cada amostra, em texels, já repetido a cada tile do mapa
+        tex_x = ((player.x + distances * dir_x) * size).astype(np.int32) & (size - 1)
+        tex_y = ((player.y + distances * dir_y) * size).astype(np.int32) & (size - 1)
+        index = tex_x * size + tex_y
+
+        top = config.half_height + first_block * step
+        left, right = start * step, min(end * step, config.width)
+        self.write_blocks(pixels[top:, left:right], self.floor.take(index))
+        texels = index.size
+        # o teto é o espelho do piso em torno do horizonte e usa o mesmo ponto do mundo
+        ceiling_row = 2 * config.half_height - 1 - top
+        if self.ceiling is not None and ceiling_row >= 0:
+            self.write_blocks(pixels[ceiling_row::-1, left:right], self.ceiling.take(index))
+            texels += index.size
+        return texels
+
+    def write_blocks(self, target, block):
+        # cada texel calculado preenche seu bloco step x step de pixels
+        step = self.step
+        for dy in range(step):
+            for dx in range(step):
+                view = target[dy::step, dx::step]
+                view[...] = block[:view.shape[0], :view.shape[1]]
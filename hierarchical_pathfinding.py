@@ -0,0 +1,310 @@
+import heapq
+from collections import deque
+
+import numpy as np
+from settings import *
+from level import WAYS
+
+
+def shift(cells, dy, dx):
+    """Desloca as duas últimas dimensões de um array booleano em (dy, dx), preenchendo com False"""
+    shifted = np.zeros_like(cells)
+    rows, cols = cells.shape[-2:]
+    shifted[..., max(dy, 0):rows + min(dy, 0), max(dx, 0):cols + min(dx, 0)] = \
+        cells[..., max(-dy, 0):rows + min(-dy, 0), max(-dx, 0):cols + min(-dx, 0)]
+    return shifted
+
+
+class HierarchicalPathFinding:
+    """Pathfinding hierárquico no estilo HPA* para mapas grandes.
+
+    O mapa é dividido em clusters quadrados. Nas bordas entre clusters vizinhos ficam os portais,
+    ligados por um grafo abstrato com as distâncias internas de cada cluster já calculadas. A rota
+    grossa é planejada nesse grafo e só o trecho dentro do cluster atual do NPC é refinado.
+    """
+    def __init__(self, game, cluster_size=HPA_CLUSTER_SIZE, corner_cutting=NAV_CORNER_CUTTING):
+        self.game = game
+        self.cluster_size = cluster_size
+        self.corner_cutting = corner_cutting
+        self.grid = None
+        self.blocks = None
+        self.map_revision = None
+        self.entrances = {}  # (cluster, cluster vizinho) -> [(tile, tile vizinho)]
+        self.portals = {}  # cluster -> [tile de portal]
+        self.fields = {}  # cluster -> distâncias locais de cada portal, (portais, altura, largura); -1 = inalcançável
+        self.edges = {}  # tile de portal -> {tile de portal: custo}
+
+        # rota grossa até o objetivo, compartilhada por todos os NPCs
+        self.goal = None
+        self.goal_cluster = None
+        self.goal_field = None
+        self.costs = {}
+        self.heap = []
+        self.next_steps = {}
+        self.build()
+
+    def build(self):
+        game_map = self.game.map
+        self.rows, self.cols = game_map.rows, game_map.cols
+        cs = self.cluster_size
+        self.clusters_x = -(-self.cols // cs)
+        self.clusters_y = -(-self.rows // cs)
+        self.map_revision = game_map.revision
+        self.update_grid()
+        self.entrances, self.portals, self.fields, self.edges = {}, {}, {}, {}
+
+        clusters = [(cx, cy) for cy in range(self.clusters_y) for cx in range(self.clusters_x)]
+        for cluster in clusters:
+            for neighbor in self.get_neighbor_clusters(cluster):
+                key = self.get_border_key(cluster, neighbor)
+                if key not in self.entrances:
+                    self.entrances[key] = self.find_entrances(*key)
+        self.build_clusters(clusters)
+        for cluster in clusters:
+            self.link_cluster(cluster)
+        self.reset_goal()
+
+    def update_grid(self):
+        cs = self.cluster_size
+        self.grid = self.game.map.grid.copy()
+        # células livres em blocos cs x cs por cluster; o que passa da borda do mapa conta como parede
+        free = np.zeros((self.clusters_y * cs, self.clusters_x * cs), dtype=bool)
+        free[:self.rows, :self.cols] = self.grid == 0
+        self.blocks = free.reshape(self.clusters_y, cs, self.clusters_x, cs).swapaxes(1, 2)
+
+    def rebuild_clusters(self, changed):
+        """Refaz só os clusters alterados e seus vizinhos, cujos portais dependem das bordas em comum"""
+        affected = set(changed)
+        for cluster in changed:
+            for neighbor in self.get_neighbor_clusters(cluster):
+                affected.add(neighbor)
+                key = self.get_border_key(cluster, neighbor)
+                self.entrances[key] = self.find_entrances(*key)
+
+        for cluster in affected:
+            for portal in self.portals.pop(cluster, []):
+                for neighbor in self.edges.pop(portal, {}):
+                    self.edges.get(neighbor, {}).pop(portal, None)
+        self.build_clusters(affected)
+        for cluster in affected:
+            self.link_cluster(cluster)
+        self.reset_goal()
+
+    def check_map(self):
+        game_map = self.game.map
+        if game_map.revision == self.map_revision:
+            return
+        if game_map.grid.shape != self.grid.shape:
+            self.build()
+            return
+        changed_y, changed_x = np.nonzero(game_map.grid != self.grid)
+        self.map_revision = game_map.revision
+        self.update_grid()
+        cs = self.cluster_size
+        changed = set(zip((changed_x // cs).tolist(), (changed_y // cs).tolist()))
+        if changed:
+            self.rebuild_clusters(changed)
+
+    def get_cluster(self, tile):
+        return tile[0] // self.cluster_size, tile[1] // self.cluster_size
+
+    def get_neighbor_clusters(self, cluster):
+        cx, cy = cluster
+        return [(nx, ny) for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1))
+                if 0 <= nx < self.clusters_x and 0 <= ny < self.clusters_y]
+
+    @staticmethod
+    def get_border_key(cluster, neighbor):
+        return (cluster, neighbor) if cluster < neighbor else (neighbor, cluster)
+
+    def find_entrances(self, cluster, neighbor):
+        """Pares de tiles que atravessam a borda, um por trecho contínuo livre dos dois lados"""
+        cs, grid = self.cluster_size, self.grid
+        if neighbor[0] != cluster[0]:
+            x = neighbor[0] * cs
+            lo, hi = cluster[1] * cs, min((cluster[1] + 1) * cs, self.rows)
+            free = (grid[lo:hi, x - 1] == 0) & (grid[lo:hi, x] == 0)
+            make_pair = lambda i: ((x - 1, lo + i), (x, lo + i))
+        else:
+            y = neighbor[1] * cs
+            lo, hi = cluster[0] * cs, min((cluster[0] + 1) * cs, self.cols)
+            free = (grid[y - 1, lo:hi] == 0) & (grid[y, lo:hi] == 0)
+            make_pair = lambda i: ((lo + i, y - 1), (lo + i, y))
+
+        entrances = []
+        start = None
+        for i, is_free in enumerate(free.tolist() + [False]):
+            if is_free and start is None:
+                start = i
+            elif not is_free and start is not None:
+                # como no HPA* original, trechos longos ganham um portal em cada ponta
+                if i - start >= 6:
+                    entrances += [make_pair(start), make_pair(i - 1)]
+                else:
+                    entrances.append(make_pair((start + i - 1) // 2))
+                start = None
+        return entrances
+
+    def build_clusters(self, clusters):
+        """Acha os portais de cada cluster e liga os do mesmo cluster pelas distâncias internas"""
+        clusters = list(clusters)
+        for cluster in clusters:
+            portals = []
+            for neighbor in self.get_neighbor_clusters(cluster):
+                key = self.get_border_key(cluster, neighbor)
+                side = 0 if key[0] == cluster else 1
+                portals += [pair[side] for pair in self.entrances[key]]
+            # um tile de canto pode ser portal de duas bordas
+            self.portals[cluster] = list(dict.fromkeys(portals))
+
+        # os campos de todos os portais saem de uma vez só
+        all_fields = self.get_local_fields([portal for cluster in clusters for portal in self.portals[cluster]])
+        start = 0
+        cs = self.cluster_size
+        for cluster in clusters:
+            portals = self.portals[cluster]
+            fields = all_fields[start:start + len(portals)]
+            start += len(portals)
+            self.fields[cluster] = fields
+
+            local_x = [portal[0] % cs for portal in portals]
+            local_y = [portal[1] % cs for portal in portals]
+            distances = fields[:, local_y, local_x].tolist()
+            for portal, row in zip(portals, distances):
+                edges = self.edges.setdefault(portal, {})
+                for other, distance in zip(portals, row):
+                    if distance > 0:
+                        edges[other] = distance
+
+    def link_cluster(self, cluster):
+        for neighbor in self.get_neighbor_clusters(cluster):
+            for tile, other in self.entrances[self.get_border_key(cluster, neighbor)]:
+                self.edges.setdefault(tile, {})[other] = 1
+                self.edges.setdefault(other, {})[tile] = 1
+
+    def get_local_fields(self, tiles):
+        """BFS a partir de cada tile sem sair do seu cluster, feita em lote por dilatação com NumPy.
+
+        Devolve (tiles, cs, cs) com as distâncias locais em passos de 8 direções; -1 = inalcançável.
+        """
+        cs = self.cluster_size
+        tiles = np.array(tiles, dtype=np.int64).reshape(-1, 2)
+        xs, ys = tiles[:, 0], tiles[:, 1]
+        free = self.blocks[ys // cs, xs // cs]
+        fields = np.full(free.shape, -1, dtype=np.int16)
+        frontier = np.zeros(free.shape, dtype=bool)
+        frontier[np.arange(len(tiles)), ys % cs, xs % cs] = True
+        fields[frontier] = 0
+
+        distance = 0
+        while frontier.any():
+            distance += 1
+            if self.corner_cutting:
+                # a vizinhança de 8 é a dilatação 3x3, separada em x e depois em y
+                grown = frontier.copy()
+                grown[:, :, 1:] |= frontier[:, :, :-1]
+                grown[:, :, :-1] |= frontier[:, :, 1:]
+                frontier = grown.copy()
+                frontier[:, 1:] |= grown[:, :-1]
+                frontier[:, :-1] |= grown[:, 1:]
+            else:
+                # as diagonais só entram pelas células que as duas retas alcançam livres
+                left, right = shift(frontier, 0, -1) & free, shift(frontier, 0, 1) & free
+                up, down = shift(frontier, -1, 0) & free, shift(frontier, 1, 0) & free
+                frontier = left | right | up | down
+                for dy, vertical in ((-1, up), (1, down)):
+                    for dx, horizontal in ((-1, left), (1, right)):
+                        frontier |= shift(horizontal, dy, 0) & shift(vertical, 0, dx)
+            frontier &= free & (fields < 0)
+            fields[frontier] = distance
+        return fields
+
+    def reset_goal(self):
+        self.goal = None
+        self.costs = {}
+        self.heap = []
+        self.next_steps = {}
+
+    def check_goal(self, goal):
+        """Começa a rota grossa: um Dijkstra no grafo abstrato saindo dos portais do cluster do objetivo.
+
+        A busca só avança sob demanda em settle, até onde os NPCs realmente consultam.
+        """
+        if goal == self.goal:
+            return
+        self.reset_goal()
+        self.goal = goal
+        self.goal_cluster = self.get_cluster(goal)
+        self.goal_field = self.get_local_fields([goal])[0]
+
+        cs = self.cluster_size
+        for portal in self.portals[self.goal_cluster]:
+            distance = int(self.goal_field[portal[1] % cs, portal[0] % cs])
+            if distance >= 0:
+                self.heap.append((distance, portal))
+        heapq.heapify(self.heap)
+
+    def settle(self, cluster):
+        """Continua o Dijkstra até fixar o custo de todos os portais alcançáveis do cluster"""
+        costs, heap, edges = self.costs, self.heap, self.edges
+        pending = [portal for portal in self.portals[cluster] if portal not in costs]
+        while pending and heap:
+            cost, node = heapq.heappop(heap)
+            if node in costs:
+                continue
+            costs[node] = cost
+            for next_node, edge_cost in edges.get(node, {}).items():
+                if next_node not in costs:
+                    heapq.heappush(heap, (cost + edge_cost, next_node))
+            while pending and pending[-1] in costs:
+                pending.pop()
+
+    def get_next_steps(self, start, goal):
+        """Vizinhos de start que aproximam do objetivo, do melhor para o pior; None se inalcançável"""
+        self.check_map()
+        self.check_goal(goal)
+        if start not in self.next_steps:
+            self.next_steps[start] = self.refine(start)
+        return self.next_steps[start]
+
+    def refine(self, start):
+        """Refina o trecho local: escolhe a saída do cluster e desce o campo de distância até ela"""
+        cluster = self.get_cluster(start)
+        self.settle(cluster)
+        cs, costs = self.cluster_size, self.costs
+        x0, y0 = cluster[0] * cs, cluster[1] * cs
+        lx, ly = start[0] - x0, start[1] - y0
+
+        # (campo local, custo restante a partir do fim do campo)
+        routes = []
+        if cluster == self.goal_cluster and self.goal_field[ly, lx] >= 0:
+            routes.append((self.goal_field, 0))
+        for portal, field in zip(self.portals[cluster], self.fields[cluster]):
+            if portal in costs and field[ly, lx] > 0:
+                routes.append((field, costs[portal]))
+        # parado num portal, a saída pode ser atravessar a borda; se ela for a melhor, o outro lado
+        # tem custo menor e o Dijkstra já o fixou
+        exits = [(step, edge_cost) for step, edge_cost in self.edges.get(start, {}).items()
+                 if step in costs and self.get_cluster(step) != cluster]
+        totals = [cost + int(field[ly, lx]) for field, cost in routes] + [edge_cost + costs[step] for step, edge_cost in exits]
+        if not totals:
+            return None
+        best = min(totals)
+
+        # sem cortar quinas, a diagonal precisa das duas retas livres
+        free = self.blocks[cluster[1], cluster[0]]
+        ways = [(dx, dy) for dx, dy in WAYS
+                if self.corner_cutting or not (dx and dy) or
+                (0 <= lx + dx < cs and 0 <= ly + dy < cs and free[ly, lx + dx] and free[ly + dy, lx])]
+        remaining = {}
+        for field, cost in routes:
+            for dx, dy in ways:
+                nx, ny = lx + dx, ly + dy
+                if 0 <= nx < cs and 0 <= ny < cs and field[ny, nx] >= 0:
+                    step, step_cost = (x0 + nx, y0 + ny), cost + int(field[ny, nx])
+                    if step_cost < remaining.get(step, best):
+                        remaining[step] = step_cost
+        for step, edge_cost in exits:
+            if costs[step] < remaining.get(step, best):
+                remaining[step] = costs[step]
+        return sorted(remaining, key=remaining.__getitem__)
@@ -0,0 +1,60 @@
+import bisect
+
+import numpy as np
+from settings import *
+
+
+class Hitscan:
+    """Resolve o tiro do jogador uma única vez por disparo, contra os intervalos projetados dos NPCs.
+
+    A cada passo os NPCs na tela registram o intervalo horizontal que ocupam, mantido ordenado pela
+    borda esquerda. Assim a consulta na mira acha os candidatos por busca binária, e o acerto vai
+    para o mais próximo que está à frente da parede da coluna central.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.lefts = []
+        self.intervals = []  # (direita, profundidade, npc), na mesma ordem de lefts
+        self.max_width = 0
+
+    def clear(self):
+        self.lefts.clear()
+        self.intervals.clear()
+        self.max_width = 0
+
+    def add(self, npc):
+        left = npc.screen_x - npc.sprite_half_width
+        right = npc.screen_x + npc.sprite_half_width
+        i = bisect.bisect_right(self.lefts, left)
+        self.lefts.insert(i, left)
+        self.intervals.insert(i, (right, npc.norm_dist, npc))
+        self.max_width = max(self.max_width, right - left)
+
+    def query(self, screen_x, max_depth):
+        """NPC mais próximo cujo intervalo contém screen_x e que está antes de max_depth"""
+        # só intervalos com a borda esquerda entre screen_x - max_width e screen_x podem conter screen_x
+        lo = bisect.bisect_right(self.lefts, screen_x - self.max_width)
+        hi = bisect.bisect_left(self.lefts, screen_x)
+        target, target_depth = None, max_depth
+        for right, depth, npc in self.intervals[lo:hi]:
+            if screen_x < right and depth < target_depth:
+                target, target_depth = npc, depth
+        return target
+
+    def get_wall_depth(self):
+        player = self.game.player
+        # o mesmo desvio mínimo da visibilidade, para o raio nunca ficar alinhado aos eixos
+        wall_depth, _, _ = self.game.raycasting.cast_rays(player.x, player.y, np.array([player.angle + 1e-6]))
+        return float(wall_depth[0])
+
+    def resolve_shot(self):
+        """Aplica o tiro pendente do jogador e devolve o NPC atingido, se houver"""
+        player = self.game.player
+        if not player.shot:
+            return None
+        # a mira fica no centro da visão 3D, em colunas da resolução interna
+        target = self.query(self.game.render_config.half_width, self.get_wall_depth())
+        if target is not None:
+            player.shot = False
+            target.take_hit(self.game.weapon.damage)
+        return target
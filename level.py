@@ -0,0 +1,285 @@
+import argparse
+import os
+import struct
+
+import numpy as np
+from settings import *
+
+# formato texto:
+#   linhas '#' são comentários (só elas podem ter caracteres fora do ASCII)
+#   cabeçalho 'width N', 'height N' e opcionalmente 'player X Y'
+#   depois da linha 'map', uma linha por fileira: '.' é ar e '1'..'9' o id da textura da parede
+AIR = '.'
+WALL_CHARS = '123456789'
+MAX_LEVEL_SIZE = 4096
+
+# vizinhos na ordem usada pela NavGraph e pelo HPA*; o bit k da máscara de navegação indica o vizinho k livre
+WAYS = (-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (1, -1), (1, 1), (-1, 1)
+
+SIDECAR_MAGIC = b'P3DLVSC1'
+SIDECAR_HEADER = struct.Struct('<8sIIqqI')  # assinatura, largura, altura, tamanho e mtime da origem, tiles livres
+SIDECAR_ALIGNMENT = 64
+
+# tabela de caracteres para valores da grade; 255 marca caractere inválido
+CHAR_VALUES = np.full(256, 255, dtype=np.uint8)
+CHAR_VALUES[ord(AIR)] = 0
+for value, char in enumerate(WALL_CHARS, start=1):
+    CHAR_VALUES[ord(char)] = value
+
+
+class LevelError(ValueError):
+    pass
+
+
+class Level:
+    """Grade do nível mais os dados derivados dela: máscaras de navegação e tiles livres"""
+    def __init__(self, grid, player_pos=None, nav_masks=None, free_tiles=None):
+        self.grid = grid
+        self.rows, self.cols = grid.shape
+        self.player_pos = player_pos
+        self.nav_masks = get_nav_masks(grid) if nav_masks is None else nav_masks
+        self.free_tiles = get_free_tiles(grid) if free_tiles is None else free_tiles
+
+
+class LevelReader:
+    """Lê o arquivo de nível em fluxo: o cabeçalho na abertura e as fileiras só quando pedidas"""
+    def __init__(self, path):
+        self.path = path
+        self.width = self.height = None
+        self.player_pos = None
+        self.player_line = None
+        self.line_number = 0
+        # bytes fora do ASCII viram U+FFFD e são recusados por next_line com o número da linha
+        self.file = open(path, encoding='ascii', errors='replace')
+        try:
+            self.read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def error(self, message, line_number=None):
+        return LevelError(f'{self.path}:{line_number or self.line_number}: {message}')
+
+    def next_line(self):
+        for line in self.file:
+            self.line_number += 1
+            line = line.strip()
+            if line and not line.startswith('#'):
+                if '\ufffd' in line:
+                    raise self.error('caractere não ASCII')
+                return line
+        return None
+
+    def read_header(self):
+        while True:
+            line = self.next_line()
+            if line is None:
+                raise self.error("fim do arquivo antes da linha 'map'")
+            if line == 'map':
+                break
+            key, *values = line.split()
+            try:
+                if key in ('width', 'height') and len(values) == 1:
+                    setattr(self, key, int(values[0]))
+                elif key == 'player' and len(values) == 2:
+                    self.player_pos = float(values[0]), float(values[1])
+                    self.player_line = self.line_number
+                else:
+                    raise self.error(f'linha de cabeçalho inválida: {line!r}')
+            except ValueError as error:
+                if isinstance(error, LevelError):
+                    raise
+                raise self.error(f'valor inválido: {line!r}')
+
+        for name in ('width', 'height'):
+            size = getattr(self, name)
+            if size is None:
+                raise self.error(f"cabeçalho sem '{name}'")
+            if not 3 <= size <= MAX_LEVEL_SIZE:
+                raise self.error(f'{name} {size} fora de 3..{MAX_LEVEL_SIZE}')
+        if self.player_pos is not None:
+            x, y = self.player_pos
+            if not (0 < x < self.width and 0 < y < self.height):
+                raise self.error(f'posição do jogador {self.player_pos} fora do mapa')
+
+    def rows(self):
+        """Gera cada fileira validada como array uint8, sem carregar o arquivo inteiro"""
+        try:
+            for y in range(self.height):
+                line = self.next_line()
+                if line is None:
+                    raise self.error(f'esperadas {self.height} fileiras, encontradas {y}')
+                if len(line) != self.width:
+                    raise self.error(f'fileira {y} com {len(line)} colunas, esperadas {self.width}')
+                row = CHAR_VALUES[np.frombuffer(line.encode('ascii'), dtype=np.uint8)]
+                if (row == 255).any():
+                    raise self.error(f'caractere inválido na fileira {y}: {line[int(np.argmax(row == 255))]!r}')
+                yield row
+            if self.next_line() is not None:
+                raise self.error(f'fileiras além das {self.height} declaradas')
+        finally:
+            self.close()
+
+    def read_grid(self):
+        grid = np.empty((self.height, self.width), dtype=np.uint8)
+        for y, row in enumerate(self.rows()):
+            grid[y] = row
+        if not (grid == 0).any():
+            raise self.error('nível sem nenhum tile livre')
+        if self.player_pos is not None:
+            x, y = self.player_pos
+            if grid[int(y), int(x)]:
+                raise self.error(f'posição do jogador {self.player_pos} dentro de uma parede', self.player_line)
+        return grid
+
+
+def get_nav_masks(grid):
+    """Máscara de 8 bits por célula com os vizinhos livres, calculada com deslocamentos da grade"""
+    rows, cols = grid.shape
+    free = np.zeros((rows + 2, cols + 2), dtype=bool)
+    free[1:-1, 1:-1] = grid == 0
+    masks = np.zeros((rows, cols), dtype=np.uint8)
+    for bit, (dx, dy) in enumerate(WAYS):
+        neighbor = free[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+        masks |= (neighbor.astype(np.uint8) << bit)
+    masks[grid != 0] = 0
+    return masks
+
+
+def get_free_tiles(grid):
+    """Índices lineares (y * largura + x) das células livres"""
+    return np.flatnonzero(grid == 0).astype(np.int32)
+
+
+def get_sidecar_path(path):
+    return path + '.bin'
+
+
+def get_source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_player_pos(path):
+    # só o cabeçalho é lido; o arquivo fecha sem passar pelas fileiras
+    with LevelReader(path) as reader:
+        return reader.player_pos
+
+
+def load_sidecar(path):
+    """Level com os arrays mapeados da sidecar, ou None se ela falta ou é de outra versão do nível"""
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.exists(sidecar_path):
+        return None
+    with open(sidecar_path, 'rb') as file:
+        header = file.read(SIDECAR_HEADER.size)
+    if len(header) < SIDECAR_HEADER.size:
+        return None
+    magic, width, height, size, mtime, free_count = SIDECAR_HEADER.unpack(header)
+    if magic != SIDECAR_MAGIC or (size, mtime) != get_source_stamp(path):
+        return None
+
+    offsets = get_sidecar_offsets(width, height)
+    # copy-on-write: o jogo pode alterar a grade sem tocar no arquivo
+    grid = np.memmap(sidecar_path, dtype=np.uint8, mode='c', offset=offsets[0], shape=(height, width))
+    nav_masks = np.memmap(sidecar_path, dtype=np.uint8, mode='r', offset=offsets[1], shape=(height, width))
+    free_tiles = np.memmap(sidecar_path, dtype=np.int32, mode='r', offset=offsets[2], shape=(free_count,))
+    # views ndarray comuns sobre o mesmo buffer, sem o custo do subtipo memmap em cada indexação
+    grid, nav_masks, free_tiles = (array.view(np.ndarray) for array in (grid, nav_masks, free_tiles))
+    return Level(grid, read_player_pos(path), nav_masks, free_tiles)
+
+
+def get_sidecar_offsets(width, height):
+    align = lambda offset: -(-offset // SIDECAR_ALIGNMENT) * SIDECAR_ALIGNMENT
+    grid_offset = align(SIDECAR_HEADER.size)
+    masks_offset = align(grid_offset + width * height)
+    free_offset = align(masks_offset + width * height)
+    return grid_offset, masks_offset, free_offset
+
+
+def write_sidecar(path, level):
+    size, mtime = get_source_stamp(path)
+    offsets = get_sidecar_offsets(level.cols, level.rows)
+    temp_path = get_sidecar_path(path) + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, level.cols, level.rows, size, mtime, len(level.free_tiles)))
+        for offset, array in zip(offsets, (level.grid, level.nav_masks, level.free_tiles)):
+            file.seek(offset)
+            file.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temp_path, get_sidecar_path(path))
+
+
+def load_level(path, use_sidecar=LEVEL_SIDECAR):
+    """Carrega o nível pela sidecar quando ela está em dia; senão lê o texto e regrava a sidecar"""
+    if use_sidecar:
+        level = load_sidecar(path)
+        if level is not None:
+            return level
+    with LevelReader(path) as reader:
+        level = Level(reader.read_grid(), reader.player_pos)
+    if use_sidecar:
+        try:
+            write_sidecar(path, level)
+        except OSError as error:
+            print(f'Sidecar do nível não gravada ({error})')
+    return level
+
+
+def save_level(path, grid, player_pos=None):
+    with open(path, 'w', encoding='ascii') as file:
+        file.write(f'width {grid.shape[1]}\nheight {grid.shape[0]}\n')
+        if player_pos is not None:
+            file.write(f'player {player_pos[0]} {player_pos[1]}\n')
+        file.write('map\n')
+        chars = np.frombuffer((AIR + WALL_CHARS).encode('ascii'), dtype=np.uint8)
+        for row in grid:
+            file.write(chars[row].tobytes().decode('ascii') + '\n')
+
+
+def generate_grid(width, height, density=0.25, seed=0):
+    """Arena aleatória com borda de paredes, para testar mapas grandes"""
+    rng = np.random.default_rng(seed)
+    grid = np.where(rng.random((height, width)) < density, rng.integers(1, 6, (height, width)), 0).astype(np.uint8)
+    grid[0, :] = grid[-1, :] = 1
+    grid[:, 0] = grid[:, -1] = 1
+    grid[1:4, 1:4] = 0
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Níveis em arquivo e suas sidecars de dados derivados')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('export', help='grava o mapa embutido como arquivo de nível')
+    command.add_argument('path')
+    command = commands.add_parser('generate', help='gera uma arena aleatória')
+    command.add_argument('path')
+    command.add_argument('--size', type=int, default=512)
+    command.add_argument('--density', type=float, default=0.25)
+    command.add_argument('--seed', type=int, default=0)
+    command = commands.add_parser('build', help='valida o nível e (re)grava a sidecar')
+    command.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        from map import minimap
+        save_level(args.path, np.array(minimap, dtype=np.uint8), PLAYER_POS)
+    elif args.command == 'generate':
+        save_level(args.path, generate_grid(args.size, args.size, args.density, args.seed), (2.5, 2.5))
+    else:
+        with LevelReader(args.path) as reader:
+            level = Level(reader.read_grid(), reader.player_pos)
+        write_sidecar(args.path, level)
+        print(f'{args.path}: {level.cols}x{level.rows}, {len(level.free_tiles)} tiles livres')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import pygame as pg
 import sys
+import time
 from settings import *
 from map import *
 from player import *
@@ -11,63 +12,158 @@ from weapon import *
 from sound import *
 from pathfinding import *
 from score_manager import *
+from controls import *
+from profiler import FrameProfiler
+from visibility import Visibility
+from assets import AssetManager
+from render_config import RenderConfig, QualityController
+from strip_pool import StripPool
 
 class Game:
-    def __init__(self):
+    def __init__(self, asset_cache_path=ASSET_CACHE_PATH):
         pg.init()
         pg.mouse.set_visible(False)
         self.screen = pg.display.set_mode(RESOLUTION)
+        # resolução interna e número de raios da visão 3D, ajustados pelo tempo dos quadros
+        self.render_config = RenderConfig(RESOLUTION)
+        self.quality = QualityController(self.render_config)
+        # threads do raycast e das colunas de parede, divididos em faixas verticais da visão
+        self.strip_pool = StripPool(RAYCAST_WORKERS)
         pg.event.set_grab(True)
         self.clock = pg.time.Clock()
-        self.delta_time = 1
+        self.controls = Controls()
+        self.fps_limit = FPS
+        self.profiler = FrameProfiler(PROFILER_STAGES, PROFILER_HISTORY, PROFILER_ENABLED)
+        # a simulação anda em passos fixos de TICK_TIME ms; self.time é o relógio simulado, em ms
+        self.delta_time = TICK_TIME
+        self.time = 0
+        self.accumulator = 0
         self.global_trigger = False
-        self.global_event = pg.USEREVENT + 0
-        pg.time.set_timer(self.global_event, 40)
+        self.game_over = False
+        # criado uma vez só: um novo jogo reaproveita os assets já carregados
+        self.assets = AssetManager(ASSET_WORKERS, asset_cache_path)
+        self.assets.preload(*ASSET_PRELOAD_DIRS)
         self.new_game()
+        self.assets.mark_startup()
+        if ASSET_REPORT:
+            self.assets.print_report()
 
     def new_game(self):
+        self.game_over = False
+        self.accumulator = 0
         self.map = Map(self)
         self.player = Player(self)
         self.object_renderer = ObjectRenderer(self)
         self.raycasting = RayCasting(self)
+        self.visibility = Visibility(self)
         self.object_handler = ObjectHandler(self)
         self.pathfinding = PathFinding(self)
         self.weapon = Weapon(self)
         self.sound = Sound(self)
         self.score_manager = ScoreManager(self)
 
+    def check_game_over(self, render=True):
+        """Reinicia o jogo depois da morte do jogador, fora do passo da simulação"""
+        if not self.game_over:
+            return
+        if render:
+            self.object_renderer.game_over()
+            pg.display.flip()
+            pg.time.delay(1500)
+            # o tempo parado na tela de fim de jogo não conta como tempo de jogo no próximo quadro
+            self.clock.tick()
+        self.new_game()
+
+    def get_ticks(self):
+        return self.time
+
     def update(self):
+        """Um passo fixo da simulação: jogador, lógica dos NPCs, spawn e animações"""
+        profiler = self.profiler
+        # dispara a cada GLOBAL_TRIGGER_TIME ms do relógio simulado
+        self.global_trigger = (self.time + TICK_TIME) // GLOBAL_TRIGGER_TIME != self.time // GLOBAL_TRIGGER_TIME
+        self.time += TICK_TIME
+        t = profiler.start()
         self.player.update()
-        self.raycasting.update()
+        t = profiler.lap('player', t)
         self.object_handler.update()
+        t = profiler.lap('object_handler', t)
         self.weapon.update()
-        pg.display.flip()
-        self.delta_time = self.clock.tick(FPS)
-        pg.display.set_caption(f"{self.clock.get_fps()}")
+        profiler.lap('weapon', t)
 
     def draw(self):
+        profiler = self.profiler
+        t = profiler.start()
+        self.raycasting.update()
+        t = profiler.lap('raycasting', t)
+        self.object_handler.draw()
+        t = profiler.lap('sprites', t)
         #self.screen.fill("black")
         self.object_renderer.draw()
+        t = profiler.lap('object_renderer', t)
         self.weapon.draw()
+        t = profiler.lap('weapon_draw', t)
+        profiler.draw_overlay(self.screen)
         #self.map.draw()
         #self.player.draw()
+        pg.display.flip()
+        profiler.lap('flip', t)
+        pg.display.set_caption(f"{self.clock.get_fps()}")
+
+    def quit(self):
+        if self.profiler.enabled and PROFILER_DUMP_PATH:
+            self.profiler.dump(PROFILER_DUMP_PATH)
+        self.assets.shutdown()
+        self.strip_pool.shutdown()
+        pg.quit()
+        sys.exit()
 
     def check_events(self):
-        self.global_trigger = False
-        for event in pg.event.get():
+        t = self.profiler.start()
+        for event in self.controls.get_events():
             if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
-                pg.quit()
-                sys.exit()
-            elif event.type == self.global_event:
-                self.global_trigger = True
+                self.quit()
+            elif event.type == pg.KEYDOWN and event.key == PROFILER_OVERLAY_KEY:
+                self.profiler.toggle_overlay()
             self.player.single_fire_event(event)
+        self.profiler.lap('events', t)
 
-    def run(self):
-        while True:
+    def advance(self, elapsed):
+        """Acumula o tempo real decorrido e roda quantos passos fixos couberem nele"""
+        # limita o atraso acumulado para um quadro lento não gerar cada vez mais passos (spiral of death)
+        self.accumulator += min(elapsed, TICK_TIME * MAX_TICKS_PER_FRAME)
+        ticks = 0
+        while self.accumulator >= TICK_TIME and ticks < MAX_TICKS_PER_FRAME and not self.game_over:
+            self.update()
+            self.accumulator -= TICK_TIME
+            ticks += 1
+        return ticks
+
+    def simulate(self, ticks):
+        """Roda a simulação sem renderizar, o mais rápido possível"""
+        for _ in range(ticks):
             self.check_events()
             self.update()
-            self.draw()
+            self.check_game_over(render=False)
+            self.profiler.end_frame()
+
+    def run(self, render=True):
+        while True:
+            elapsed = self.clock.tick(self.fps_limit)
+            # o tempo de trabalho do quadro, sem a espera do limite de FPS
+            frame_start = time.perf_counter()
+            self.check_events()
+            self.advance(elapsed)
+            if render:
+                self.draw()
+                self.quality.update((time.perf_counter() - frame_start) * 1000)
+            self.profiler.end_frame()
+            self.check_game_over(render)
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    if sys.argv[1:2] == ["benchmark"]:
+        import benchmark
+        benchmark.main(sys.argv[2:])
+    else:
+        game = Game()
+        game.run()
@@ -1,4 +1,7 @@
 import pygame as pg
+import numpy as np
+from settings import *
+from level import Level, load_level, get_nav_masks, get_free_tiles
 
 # A = AIR
 # 1 = WALL
@@ -28,19 +31,93 @@ minimap = [[1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,2,2,2,2,2,2,2,2,2,2,2,2,2,2,
            [4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,4,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5]]
 
 class Map:
-    def __init__(self, game):
+    def __init__(self, game, path=LEVEL_PATH):
         self.game = game
-        self.minimap = minimap
-        self.worldmap = {}
+        # nível em arquivo (com a sidecar mapeada em memória) ou o mapa embutido
+        self.level = load_level(path) if path else Level(np.array(minimap, dtype=np.uint8), PLAYER_POS)
+        self.rows, self.cols = self.level.rows, self.level.cols
+        self.grid = None
+        self.cells = bytearray()
+        # incrementado a cada alteração do mapa, para quem guarda dados derivados dele
+        self.revision = 0
+        self.derived = {}  # nome -> (revisão, valor) dos dados recalculados quando o mapa muda
         self.get_map()
 
-    # gera um dicionário com as coordenadas das paredes
+    # grade [y, x] com o id da textura de cada célula (0 = ar) e sua cópia linear para consultas escalares
     def get_map(self):
-        for j, row in enumerate(self.minimap):
-            for i, value in enumerate(row):
-                if value:
-                    self.worldmap[(i, j)] = value
-                    print(self.worldmap)
+        self.grid = self.level.grid
+        # bytearray para set_tile trocar um byte só, sem copiar a grade inteira
+        self.cells = bytearray(self.grid.tobytes())
+
+    @property
+    def player_pos(self):
+        if self.level.player_pos is not None:
+            return self.level.player_pos
+        # sem posição no arquivo, começa no centro do primeiro tile livre
+        y, x = divmod(int(self.level.free_tiles[0]), self.cols)
+        return x + 0.5, y + 0.5
+
+    def get_derived(self, name, build, initial=None):
+        """Valor derivado do mapa: o pré-calculado do nível enquanto ele não mudou, senão refeito por revisão"""
+        if initial is not None and not self.revision:
+            return initial
+        revision, value = self.derived.get(name, (None, None))
+        if revision != self.revision:
+            value = build()
+            self.derived[name] = self.revision, value
+        return value
+
+    # dicionário com as coordenadas e texturas das paredes, montado só quando alguém pede
+    @property
+    def worldmap(self):
+        def build():
+            ys, xs = np.nonzero(self.grid)
+            return dict(zip(zip(xs.tolist(), ys.tolist()), self.grid[ys, xs].tolist()))
+        return self.get_derived('worldmap', build)
+
+    # máscara de vizinhos livres por célula, no formato de level.get_nav_masks
+    @property
+    def nav_masks(self):
+        return self.get_derived('nav_masks', lambda: get_nav_masks(self.grid), self.level.nav_masks)
+
+    # índices lineares (y * cols + x) das células livres
+    @property
+    def free_tiles(self):
+        return self.get_derived('free_tiles', lambda: get_free_tiles(self.grid), self.level.free_tiles)
+
+    def set_tile(self, x, y, value):
+        self.grid[y, x] = value
+        self.cells[y * self.cols + x] = value
+        self.revision += 1
+
+    def get_tile(self, x, y):
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self.cells[y * self.cols + x]
+        return 0
+
+    def is_wall(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.cells[y * self.cols + x] != 0
+
+    def get_free_pos(self, pos):
+        """pos se ela cai num tile livre do mapa; senão o centro do tile livre mais próximo"""
+        x, y = pos
+        tile_x, tile_y = int(x), int(y)
+        if 0 <= tile_x < self.cols and 0 <= tile_y < self.rows and not self.is_wall(tile_x, tile_y):
+            return pos
+        free_y, free_x = np.divmod(self.free_tiles, self.cols)
+        i = int(np.argmin((free_x + 0.5 - x) ** 2 + (free_y + 0.5 - y) ** 2))
+        return float(free_x[i]) + 0.5, float(free_y[i]) + 0.5
+
+    def get_tiles(self, x, y):
+        """Versão vetorizada de get_tile para arrays de coordenadas (contínuas ou inteiras)"""
+        tile_x, tile_y = np.asarray(x).astype(np.int64), np.asarray(y).astype(np.int64)
+        inside = (tile_x >= 0) & (tile_x < self.cols) & (tile_y >= 0) & (tile_y < self.rows)
+        tiles = np.zeros(tile_x.shape, dtype=np.uint8)
+        tiles[inside] = self.grid[tile_y[inside], tile_x[inside]]
+        return tiles
+
+    def are_walls(self, x, y):
+        return self.get_tiles(x, y) != 0
 
     def draw(self):
         [pg.draw.rect(self.game.screen, "white", (x * 100, y * 100, 100, 100), 2) for x, y in self.worldmap]
@@ -0,0 +1,100 @@
+from collections import deque
+
+import numpy as np
+from settings import *
+from level import WAYS
+
+# diagonais e as duas direções retas que ela atravessa, como bits de WAYS
+DIAGONAL_SIDES = {4: (0, 1), 5: (2, 1), 6: (2, 3), 7: (0, 3)}
+# a partir deste tamanho a BFS em camadas com NumPy passa a ganhar da fila em Python
+VECTOR_BFS_MIN_CELLS = 256 * 256
+
+
+def remove_corner_cuts(masks):
+    """Tira das máscaras as diagonais que passam pela quina de uma parede"""
+    masks = masks.copy()
+    for bit, (a, b) in DIAGONAL_SIDES.items():
+        blocked = ((masks >> a) & (masks >> b) & 1) == 0
+        masks[blocked] &= np.uint8(~(1 << bit) & 0xFF)
+    return masks
+
+
+class NavGraph:
+    """Grafo de navegação compacto no formato CSR, sobre os índices lineares (y * cols + x) das células.
+
+    Os vizinhos da célula i são neighbors[offsets[i]:offsets[i + 1]], na ordem de WAYS. É montado
+    direto das máscaras de navegação do mapa, sem laço em Python por célula.
+    """
+    def __init__(self, masks, corner_cutting=NAV_CORNER_CUTTING):
+        self.rows, self.cols = masks.shape
+        self.corner_cutting = corner_cutting
+        masks = np.ascontiguousarray(masks if corner_cutting else remove_corner_cuts(masks)).ravel()
+        bits = ((masks[:, None] >> np.arange(len(WAYS), dtype=np.uint8)) & 1).astype(bool)
+        deltas = np.array([dy * self.cols + dx for dx, dy in WAYS], dtype=np.int32)
+
+        self.offsets = np.zeros(len(masks) + 1, dtype=np.int32)
+        self.degrees = bits.sum(axis=1, dtype=np.int32)
+        np.cumsum(self.degrees, out=self.offsets[1:])
+        # a máscara em ordem de linha mantém cada célula contígua e seus vizinhos na ordem de WAYS
+        self.neighbors = (np.arange(len(masks), dtype=np.int32)[:, None] + deltas)[bits]
+        self.lists = None  # cópias em listas Python para a BFS por fila, feitas no primeiro uso
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_index(self, tile):
+        x, y = tile
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return y * self.cols + x
+        return None
+
+    def get_tile(self, index):
+        y, x = divmod(index, self.cols)
+        return x, y
+
+    def get_neighbors(self, index):
+        return self.neighbors[self.offsets[index]:self.offsets[index + 1]]
+
+    def bfs(self, start):
+        """Lista com a distância em passos de start até cada célula; -1 = inalcançável"""
+        if len(self) < VECTOR_BFS_MIN_CELLS:
+            return self.queue_bfs(start)
+        return self.vector_bfs(start).tolist()
+
+    def queue_bfs(self, start):
+        # em mapas pequenos a fila em Python sobre as listas do CSR custa menos que as chamadas NumPy por camada
+        if self.lists is None:
+            self.lists = self.offsets.tolist(), self.neighbors.tolist()
+        offsets, neighbors = self.lists
+        distance = [-1] * len(self)
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            next_distance = distance[node] + 1
+            for next_node in neighbors[offsets[node]:offsets[node + 1]]:
+                if distance[next_node] < 0:
+                    distance[next_node] = next_distance
+                    queue.append(next_node)
+        return distance
+
+    def vector_bfs(self, start):
+        """BFS em camadas: cada passo expande a fronteira inteira de uma vez com NumPy"""
+        offsets, neighbors, degrees = self.offsets, self.neighbors, self.degrees
+        distance = np.full(len(self), -1, dtype=np.int32)
+        distance[start] = 0
+        frontier = np.array([start], dtype=np.int32)
+        step = 0
+        while len(frontier):
+            step += 1
+            # junta as fatias de vizinhos de toda a fronteira num único array
+            counts = degrees[frontier]
+            ends = np.cumsum(counts)
+            positions = np.arange(ends[-1], dtype=np.int32) + np.repeat(offsets[frontier] - ends + counts, counts)
+            candidates = neighbors[positions]
+            candidates = candidates[distance[candidates] < 0]
+            # a mesma célula pode vir de vários vizinhos; a última escrita marca a cópia que fica
+            distance[candidates] = np.arange(len(candidates), dtype=np.int32)
+            frontier = candidates[distance[candidates] == np.arange(len(candidates), dtype=np.int32)]
+            distance[frontier] = step
+        return distance
@@ -1,5 +1,8 @@
 from sprite_object import *
 from npc import *
+from spatial_index import SpatialHash
+from spawning import AliasTable, SpawnIndex
+from hitscan import Hitscan
 import pygame as pg
 import random
 import math
@@ -14,7 +17,12 @@ class ObjectHandler:
         self.animated_sprite_path = 'sprites/animated_sprites/'
         add_sprite = self.add_sprite
         add_npc = self.add_npc
-        self.npc_positions = {}
+        # NPCs vivos indexados por posição, atualizado incrementalmente conforme andam, nascem e morrem
+        self.spatial_index = SpatialHash()
+        # sprites fixos (decoração) num índice à parte, para a ocupação e a contagem acima serem só de NPCs
+        self.sprite_index = SpatialHash()
+        # intervalos na tela dos NPCs visíveis, refeitos a cada passo para o tiro
+        self.hitscan = Hitscan(game)
         
         # Enemy spawning system
         self.spawn_timer = 0
@@ -30,7 +38,13 @@ class ObjectHandler:
             CyberDemonNPC: 10  # rare but powerful
         }
 
-        # sprites
+        # Precomputed spawn sampling: free tiles by distance ring and one alias table per zone
+        self.spawn_index = SpawnIndex(game, self.min_spawn_distance, self.max_spawn_distance)
+        self.class_table = AliasTable(self.enemy_classes)
+        self.zone_tables = {}
+
+        # sprites; as posições são as do mapa embutido, e add_sprite/add_npc movem para o tile livre
+        # mais próximo o que cair numa parede de um nível carregado de arquivo
         add_sprite(SpriteObject(game))
         add_sprite(AnimatedSprite(game))
 
@@ -39,13 +53,24 @@ class ObjectHandler:
         add_npc(CacoDemonNPC(game, pos=(3.5, 4.5)))
 
     def update(self):
-        self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
-        
-        # Update sprites and NPCs
+        # Line of sight for every alive NPC in one batch
+        self.game.visibility.update(self.spatial_index)
+        self.hitscan.clear()
+
+        # Update sprites and NPCs, keeping the spatial index in sync
         for sprite in self.sprite_list:
             sprite.update()
         for npc in self.npc_list:
             npc.update()
+            if npc.alive:
+                self.spatial_index.move(npc)
+            elif npc in self.spatial_index:
+                self.spatial_index.remove(npc)
+
+        # One hitscan per shot against the intervals the NPCs registered this tick
+        target = self.hitscan.resolve_shot()
+        if target is not None and not target.alive:
+            self.spatial_index.remove(target)
         
         # Remove NPCs only after death animation is complete
         self.npc_list = [npc for npc in self.npc_list if self.should_keep_npc(npc)]
@@ -53,6 +78,13 @@ class ObjectHandler:
         # Handle enemy spawning
         self.handle_spawning()
 
+    def draw(self):
+        """Project visible sprites and NPCs into the render queue"""
+        for sprite in self.sprite_list:
+            sprite.draw()
+        for npc in self.npc_list:
+            npc.draw()
+
     def should_keep_npc(self, npc):
         """Determine if an NPC should be kept in the list"""
         # Keep alive NPCs
@@ -78,10 +110,10 @@ class ObjectHandler:
 
     def handle_spawning(self):
         """Handle the enemy spawning system with time delays"""
-        current_time = pg.time.get_ticks()
+        current_time = self.game.get_ticks()
         
         # Count only alive NPCs for spawning limit
-        alive_enemy_count = sum(1 for npc in self.npc_list if npc.alive)
+        alive_enemy_count = len(self.spatial_index)
         
         # Check if it's time to spawn and we haven't reached max enemies
         if (current_time - self.spawn_timer > self.spawn_delay and 
@@ -98,54 +130,34 @@ class ObjectHandler:
 
     def find_valid_spawn_position(self):
         """Find a valid position to spawn an enemy near but not too close to the player"""
-        player_x, player_y = self.game.player.pos
-        
-        # Try multiple times to find a valid position
-        for _ in range(50):
-            # Generate random angle and distance
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(self.min_spawn_distance, self.max_spawn_distance)
-            
-            # Calculate potential spawn position
-            spawn_x = player_x + distance * math.cos(angle)
-            spawn_y = player_y + distance * math.sin(angle)
-            
-            # Check if position is valid (not in wall, within map bounds)
-            if self.is_valid_spawn_position(spawn_x, spawn_y):
-                return (spawn_x, spawn_y)
-        
-        return None
+        return self.spawn_index.sample(self.is_valid_spawn_position)
 
     def is_valid_spawn_position(self, x, y):
         """Check if a position is valid for spawning (not in wall, within bounds)"""
         # Check map boundaries
-        map_width = len(self.game.map.minimap[0])
-        map_height = len(self.game.map.minimap)
+        map_width = self.game.map.cols
+        map_height = self.game.map.rows
         
         if x < 1 or x >= map_width - 1 or y < 1 or y >= map_height - 1:
             return False
         
         # Check if position is not in a wall
-        if (int(x), int(y)) in self.game.map.worldmap:
+        if self.game.map.is_wall(int(x), int(y)):
             return False
         
         # Check if position is not too close to existing NPCs
-        for npc in self.npc_list:
-            if npc.alive:
-                dist = math.sqrt((x - npc.x) ** 2 + (y - npc.y) ** 2)
-                if dist < 3:  # minimum distance between NPCs
-                    return False
+        if self.spatial_index.query_radius(x, y, 3):  # minimum distance between NPCs
+            return False
+
+        # Check if position is not on a decoration sprite's tile
+        if self.sprite_index.is_occupied((int(x), int(y))):
+            return False
         
         return True
 
     def select_enemy_class(self):
         """Select an enemy class based on weighted probabilities"""
-        # Create weighted list
-        weighted_choices = []
-        for enemy_class, weight in self.enemy_classes.items():
-            weighted_choices.extend([enemy_class] * weight)
-        
-        return random.choice(weighted_choices)
+        return self.class_table.sample()
 
     def spawn_enemy(self, enemy_class, position):
         """Spawn a specific enemy class at the given position"""
@@ -161,15 +173,20 @@ class ObjectHandler:
         print(f"Spawned {enemy_class.__name__} at position {position}")
 
     def add_npc(self, npc):
+        npc.x, npc.y = self.game.map.get_free_pos((npc.x, npc.y))
         self.npc_list.append(npc)
+        if npc.alive:
+            self.spatial_index.insert(npc)
 
     def add_sprite(self, sprite):
+        sprite.x, sprite.y = self.game.map.get_free_pos((sprite.x, sprite.y))
         self.sprite_list.append(sprite)
+        self.sprite_index.insert(sprite)
 
     def get_map_zone(self, x, y):
         """Determine which themed zone of the map the position is in"""
-        map_width = len(self.game.map.minimap[0])
-        map_height = len(self.game.map.minimap)
+        map_width = self.game.map.cols
+        map_height = self.game.map.rows
         
         # Define zones based on map layout
         if y < map_height * 0.5:  # Top half
@@ -199,18 +216,14 @@ class ObjectHandler:
     def select_enemy_class_for_zone(self, spawn_pos):
         """Select enemy class based on spawn zone"""
         zone = self.get_map_zone(spawn_pos[0], spawn_pos[1])
-        zone_preferences = self.get_zone_enemy_preference(zone)
-        
-        # Create weighted list based on zone preferences
-        weighted_choices = []
-        for enemy_class, weight in zone_preferences.items():
-            weighted_choices.extend([enemy_class] * weight)
-        
-        return random.choice(weighted_choices)
+        table = self.zone_tables.get(zone)
+        if table is None:
+            table = self.zone_tables[zone] = AliasTable(self.get_zone_enemy_preference(zone))
+        return table.sample()
 
     def adjust_spawn_delay_by_difficulty(self):
         """Adjust spawn delay based on game progression (more enemies = higher difficulty)"""
-        alive_enemy_count = sum(1 for npc in self.npc_list if npc.alive)
+        alive_enemy_count = len(self.spatial_index)
         
         # Reduce spawn delay as more enemies are killed (increase difficulty)
         base_delay = 5000
@@ -232,9 +245,9 @@ class ObjectHandler:
 
     def get_spawn_info(self):
         """Get information about current spawning state"""
-        current_time = pg.time.get_ticks()
+        current_time = self.game.get_ticks()
         time_until_spawn = max(0, self.spawn_delay - (current_time - self.spawn_timer))
-        alive_enemy_count = sum(1 for npc in self.npc_list if npc.alive)
+        alive_enemy_count = len(self.spatial_index)
         
         return {
             'current_enemies': alive_enemy_count,
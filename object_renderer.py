@@ -1,24 +1,57 @@
 import pygame as pg
+import numpy as np
 from settings import *
+from render_queue import RenderQueue
+from background import BackgroundLayer
+from floor_caster import FloorCaster
 
 class ObjectRenderer:
     def __init__(self, game):
         self.game = game
         self.screen = game.screen
+        self.config = game.render_config
+        self.config_revision = None
+        # superfície da visão 3D na resolução interna; é a própria tela quando não há ampliação
+        self.view = None
         self.wall_textures = self.load_wall_textures()
+        self.wall_renderer = WALL_RENDERER
+        self.render_queue = RenderQueue(self.config.num_rays)
+        self.wall_atlas, self.wall_atlas_base = self.get_wall_atlas()
+        self.check_config()
         self.sky_image = self.get_texture('textures/sky.png', (WIDTH, HALF_HEIGHT))
         self.sky_offset = 0
+        self.background = BackgroundLayer(self.sky_image, FLOOR_COLOR)
+        self.floor = self.get_floor_caster()
+        self.floor_texels = 0
         self.blood_screen = self.get_texture('textures/blood_screen.png', (WIDTH, HEIGHT))
         self.digit_size = 80
         self.digit_images = [self.get_texture(f'textures/digits/{i}.png', [self.digit_size] * 2) for i in range(11)]
         self.digits = dict(zip(map(str, range(11)), self.digit_images))
         self.game_over_image = self.get_texture('textures/game_over.png', (WIDTH, HEIGHT))
+        self.damage_flash = False
+
+    def check_config(self):
+        config = self.config
+        if config.revision == self.config_revision:
+            return
+        self.config_revision = config.revision
+        self.view = pg.Surface(config.resolution).convert(self.screen) if config.upscaled else self.screen
+        self.screen_rows = np.arange(config.height, dtype=np.float32)
 
     def draw(self):
+        self.check_config()
         self.draw_background()
+        t = self.game.profiler.start()
+        self.draw_floor()
+        self.game.profiler.lap('floor', t)
         self.render_game_objects()
+        self.present()
+        # o HUD é desenhado direto na janela, sem passar pela ampliação
         self.draw_player_health()
         self.draw_score()
+        if self.damage_flash:
+            self.screen.blit(self.blood_screen, (0, 0))
+            self.damage_flash = False
 
     def game_over(self):
         self.screen.blit(self.game_over_image, (0, 0))
@@ -31,26 +64,104 @@ class ObjectRenderer:
         
 
     def player_damage(self):
-        self.screen.blit(self.blood_screen, (0, 0))
-        pg.display.flip()
-        pg.time.delay(10)
+        # a simulação não desenha; a tela de sangue aparece no próximo quadro renderizado
+        self.damage_flash = True
 
     def draw_background(self):
-        self.sky_offset = (self.sky_offset + 4.5 * self.game.player.rel) % WIDTH
-        self.screen.blit(self.sky_image, (-self.sky_offset, 0))
-        self.screen.blit(self.sky_image, (-self.sky_offset + WIDTH, 0))
+        self.sky_offset = (self.sky_offset + 4.5 * self.game.player.view_rel) % WIDTH
+        self.game.player.view_rel = 0
+        if self.wall_renderer == 'blit':
+            self.background.draw(self.view, self.get_view_sky_offset())
+        else:
+            pixels = pg.surfarray.pixels2d(self.view)
+            self.background.copy_to(self.view, pixels, self.get_view_sky_offset())
+            del pixels
+
+    def get_floor_caster(self, floor_texture=FLOOR_TEXTURE, ceiling_texture=CEILING_TEXTURE):
+        if not floor_texture:
+            return None
+        # mesmo formato de pixel e layout [x, y] do atlas das paredes
+        get_pixels = lambda path: pg.surfarray.array2d(self.get_texture(path).convert(self.screen)).astype(np.uint32)
+        ceiling = get_pixels(ceiling_texture) if ceiling_texture else None
+        return FloorCaster(get_pixels(floor_texture), ceiling, FLOOR_CAST_STEP)
+
+    def draw_floor(self):
+        """Projeta o piso (e o teto) sobre o fundo, antes das paredes e sprites"""
+        if self.floor is None:
+            return
+        config = self.config
+        # as linhas acima da base da parede mais baixa ficam cobertas em todas as colunas; a folga
+        # cobre a altura quantizada das colunas de parede
+        lowest_wall = int(self.game.raycasting.ray_proj_heights.min()) // 2 - WALL_COLUMN_HEIGHT_STEP - 1
+        first_row = config.half_height + max(lowest_wall, 0)
+        self.floor.check_tables(config)
+        pixels = pg.surfarray.pixels2d(self.view).T
+        player = self.game.player
+        # cada faixa de colunas de amostra escreve só nas suas colunas da visão
+        texels = self.game.strip_pool.run(
+            lambda start, end: self.floor.draw(pixels, config, player, first_row, start, end), self.floor.get_columns())
+        del pixels
+        self.floor_texels = sum(texels)
 
-        pg.draw.rect(self.screen, FLOOR_COLOR, (0, HALF_HEIGHT, WIDTH, HEIGHT))
+    def get_view_sky_offset(self):
+        # o deslocamento do céu é guardado em pixels da janela
+        return self.sky_offset * self.config.width / WIDTH
 
     def render_game_objects(self):
-        list_objects = sorted(self.game.raycasting.objects_to_render, key=lambda t: t[0], reverse=True)
-        for depth, pos, texture in list_objects:
-            self.screen.blit(texture, pos)
-
-    @staticmethod
-    def get_texture(path, res=(TEXTURE_SIZE, TEXTURE_SIZE)):
-        texture = pg.image.load(path).convert_alpha()
-        return pg.transform.scale(texture, res)
+        if self.wall_renderer == 'surfarray':
+            self.draw_walls()
+        self.render_queue.draw(self.view)
+
+    def present(self):
+        """Amplia a visão 3D da resolução interna para a janela"""
+        if self.view is not self.screen:
+            pg.transform.scale(self.view, self.screen.get_size(), self.screen)
+
+    def get_wall_atlas(self):
+        """Empacota as texturas das paredes, já no formato de pixel da tela, em um único array contíguo"""
+        textures = sorted(self.wall_textures.items())
+        atlas = np.concatenate([pg.surfarray.array2d(texture.convert(self.screen)).ravel() for _, texture in textures]).astype(np.uint32)
+        # posição inicial de cada textura no atlas, indexada pelo id da textura
+        base = np.zeros(max(self.wall_textures) + 1, dtype=np.int64)
+        for i, (texture_id, _) in enumerate(textures):
+            base[texture_id] = i * TEXTURE_SIZE * TEXTURE_SIZE
+        return atlas, base
+
+    def draw_walls(self):
+        """Escreve a camada de paredes direto na tela, calculando o texel de cada pixel de cada coluna"""
+        # a visão transposta fica (altura, largura), na mesma ordem da memória
+        pixels = pg.surfarray.pixels2d(self.view).T
+        # cada faixa de raios escreve só nas suas colunas da visão
+        self.game.strip_pool.run(lambda start, end: self.draw_wall_strip(pixels, start, end), self.config.num_rays)
+        del pixels
+
+    def draw_wall_strip(self, pixels, start, end):
+        raycasting = self.game.raycasting
+        config = self.config
+        scale, height, half_height = config.scale, config.height, config.half_height
+        proj_height = raycasting.ray_proj_heights[start:end].astype(np.float32)
+
+        # só as linhas cobertas pela parede mais alta da faixa precisam ser calculadas
+        half_span = min(int(proj_height.max()) // 2 + 1, half_height)
+        top, bottom = half_height - half_span, min(half_height + half_span, height)
+        rows = self.screen_rows[top:bottom, None]
+
+        # linha da textura para cada pixel de cada raio, array (linhas, raios)
+        tex_y = (rows - (half_height - proj_height / 2)) * (TEXTURE_SIZE / proj_height)
+        mask = (tex_y >= 0) & (tex_y < TEXTURE_SIZE)
+        np.clip(tex_y, 0, TEXTURE_SIZE - 1, out=tex_y)
+
+        tex_x = (raycasting.ray_offsets[start:end] * (TEXTURE_SIZE - scale)).astype(np.int32)
+        column_base = (self.wall_atlas_base[raycasting.ray_textures[start:end]] + tex_x * TEXTURE_SIZE).astype(np.int32)
+        index = column_base + tex_y.astype(np.int32)
+
+        # cada raio ocupa scale colunas da visão, que leem colunas vizinhas da textura
+        for sub in range(scale):
+            columns = pixels[top:bottom, start * scale + sub:end * scale:scale]
+            np.copyto(columns, self.wall_atlas.take(index + sub * TEXTURE_SIZE), where=mask)
+
+    def get_texture(self, path, res=(TEXTURE_SIZE, TEXTURE_SIZE)):
+        return self.game.assets.load_image(path, res).get()
     
     def load_wall_textures(self):
         return {
@@ -1,47 +1,75 @@
-from collections import deque
-from functools import lru_cache
+from settings import *
+from nav_graph import NavGraph
+from hierarchical_pathfinding import HierarchicalPathFinding
 
 
 class PathFinding:
     def __init__(self, game):
         self.game = game
-        self.map = game.map.minimap
-        self.ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
-        self.graph = {}
-        self.get_graph()
+        self.mode = self.get_mode()
+        self.graph = None
+        self.map_revision = game.map.revision
+        # em mapas grandes o grafo plano nem é montado
+        self.hierarchical = HierarchicalPathFinding(game) if self.mode == 'hierarchical' else None
+        if self.hierarchical is None:
+            self.get_graph()
+
+        # campo de fluxo: distância em passos de cada tile até o objetivo (-1 = inalcançável),
+        # indexada pelo índice linear do tile e compartilhada por todos os NPCs
+        self.goal = None
+        self.distance = []
+        self.next_steps = {}
 
-    @lru_cache
     def get_path(self, start, goal):
-        self.visited = self.bfs(start, goal, self.graph)
-        path = [goal]
-        step = self.visited.get(goal, start)
-
-        while step and step != start:
-            path.append(step)
-            step = self.visited[step]
-        return path[-1]
-
-    def bfs(self, start, goal, graph):
-        queue = deque([start])
-        visited = {start: None}
-
-        while queue:
-            cur_node = queue.popleft()
-            if cur_node == goal:
-                break
-            next_nodes = graph[cur_node]
-
-            for next_node in next_nodes:
-                if next_node not in visited and next_node not in self.game.object_handler.npc_positions:
-                    queue.append(next_node)
-                    visited[next_node] = cur_node
-        return visited
-
-    def get_next_nodes(self, x, y):
-        return [(x + dx, y + dy) for dx, dy in self.ways if (x + dx, y + dy) not in self.game.map.worldmap]
+        """Próximo tile do caminho de start até goal, lido do campo de fluxo do objetivo ou do HPA*"""
+        if self.hierarchical is not None:
+            steps = self.hierarchical.get_next_steps(start, goal)
+        else:
+            self.check_flow_field(goal)
+            steps = self.get_next_steps(start)
+        if steps is None:
+            return goal
+
+        is_occupied = self.game.object_handler.spatial_index.is_occupied
+        for step in steps:
+            # a ocupação dos NPCs muda a cada passo, então é verificada só na vizinhança
+            if step == goal or not is_occupied(step):
+                return step
+        return start
+
+    def get_mode(self):
+        if PATHFINDING_MODE != 'auto':
+            return PATHFINDING_MODE
+        game_map = self.game.map
+        return 'hierarchical' if game_map.rows * game_map.cols >= HPA_MIN_CELLS else 'flow_field'
+
+    def get_next_steps(self, node):
+        """Vizinhos mais próximos do objetivo que node, do melhor para o pior; None se inalcançável"""
+        if node in self.next_steps:
+            return self.next_steps[node]
+        index = self.graph.get_index(node)
+        distance = self.distance
+        if index is None or distance[index] < 0:
+            steps = None
+        else:
+            steps = sorted((next_index for next_index in self.graph.get_neighbors(index).tolist()
+                            if 0 <= distance[next_index] < distance[index]),
+                           key=distance.__getitem__)
+            steps = [self.graph.get_tile(next_index) for next_index in steps]
+        self.next_steps[node] = steps
+        return steps
+
+    def check_flow_field(self, goal):
+        if self.game.map.revision != self.map_revision:
+            self.get_graph()
+            self.map_revision = self.game.map.revision
+            self.goal = None
+        if goal != self.goal:
+            self.goal = goal
+            index = self.graph.get_index(goal)
+            self.distance = self.graph.bfs(index) if index is not None else [-1] * len(self.graph)
+            self.next_steps = {}
 
     def get_graph(self):
-        for y, row in enumerate(self.map):
-            for x, col in enumerate(row):
-                if not col:
-                    self.graph[(x, y)] = self.graph.get((x, y), []) + self.get_next_nodes(x, y)
\ No newline at end of file
+        """Grafo CSR dos tiles livres, montado das máscaras de navegação pré-calculadas do mapa"""
+        self.graph = NavGraph(self.game.map.nav_masks)
@@ -5,21 +5,21 @@ import math
 class Player:
     def __init__(self, game):
         self.game = game
-        self.x, self.y = PLAYER_POS
+        self.x, self.y = game.map.player_pos
         self.angle = PLAYER_ANGLE
         self.shot = False
         self.health = PLAYER_MAX_HEALTH
         self.rel = 0
+        # movimento do mouse acumulado desde o último quadro desenhado, usado para rolar o céu
+        self.view_rel = 0
 
     def check_game_over(self):
-        if self.health <= 0:
+        if self.health <= 0 and not self.game.game_over:
             # Reset score when player dies
             if hasattr(self.game, 'score_manager'):
                 self.game.score_manager.reset_score()
-            self.game.object_renderer.game_over()
-            pg.display.flip()
-            pg.time.delay(1500)
-            self.game.new_game()
+            # a simulação só marca o fim de jogo; a tela e o reinício ficam com Game.check_game_over
+            self.game.game_over = True
 
     def get_damage(self, damage):
         self.health -= damage
@@ -43,7 +43,7 @@ class Player:
         speed_sin = speed * sin_a
         speed_cos = speed * cos_a
 
-        keys = pg.key.get_pressed()
+        keys = self.game.controls.get_pressed()
         if keys[pg.K_w]:
             dx += speed_cos
             dy += speed_sin
@@ -68,7 +68,7 @@ class Player:
 
     # verifica se a posição fornecida é uma parede, se for, retorna False, se não, retorna True
     def check_wall(self, x, y):
-        return (x, y) not in self.game.map.worldmap.keys()
+        return not self.game.map.is_wall(x, y)
     
     # verifica se a posição futura é uma parede, se for, não move o jogador
     def check_wall_collision(self, dx, dy):
@@ -83,11 +83,9 @@ class Player:
         pg.draw.circle(self.game.screen, "red", (self.x * 100, self.y * 100), 15)
 
     def mouse_control(self):
-        mx, my = pg.mouse.get_pos()
-        if mx < MOUSE_BORDER_LEFT or mx > MOUSE_BORDER_RIGHT:
-            pg.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
-        self.rel = pg.mouse.get_rel()[0]
+        self.rel = self.game.controls.get_mouse_rel()
         self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, self.rel))
+        self.view_rel += self.rel
         self.angle += self.rel * MOUSE_SENSITIVY * self.game.delta_time
 
     def update(self):
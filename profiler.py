@@ -0,0 +1,136 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pygame as pg
+
+perf_counter_ns = time.perf_counter_ns
+
+
+class FrameProfiler:
+    """Mede cada etapa do quadro com perf_counter_ns e guarda o histórico em buffers circulares.
+
+    Desligado, start e lap só retornam 0, então as chamadas podem ficar sempre no loop do jogo.
+    """
+    def __init__(self, stages, history=600, enabled=False):
+        self.stages = list(stages)
+        self.history = history
+        self.enabled = enabled
+        self.overlay = False
+        # um buffer circular por etapa, em nanossegundos, mais o tempo total de cada quadro
+        self.samples = {stage: np.zeros(history, dtype=np.int64) for stage in self.stages}
+        self.frame_samples = np.zeros(history, dtype=np.int64)
+        self.current = dict.fromkeys(self.stages, 0)
+        self.totals = dict.fromkeys(self.stages, 0)
+        self.index = 0
+        self.count = 0
+        self.frame_start = 0
+        self.font = None
+        self.overlay_surface = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.frame_start = perf_counter_ns()
+        self.current = dict.fromkeys(self.stages, 0)
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.overlay_surface = None
+        if self.overlay and not self.enabled:
+            self.set_enabled(True)
+
+    def start(self):
+        if not self.enabled:
+            return 0
+        return perf_counter_ns()
+
+    def lap(self, stage, start):
+        """Soma o tempo desde start à etapa e retorna o instante atual, que serve de start da próxima"""
+        if not self.enabled:
+            return 0
+        now = perf_counter_ns()
+        # start 0 vem de uma etapa iniciada com o profiler ainda desligado
+        if start:
+            self.current[stage] += now - start
+        return now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        i = self.index
+        for stage, elapsed in self.current.items():
+            self.samples[stage][i] = elapsed
+            self.totals[stage] += elapsed
+            self.current[stage] = 0
+        self.frame_samples[i] = now - self.frame_start
+        self.frame_start = now
+        self.index = (i + 1) % self.history
+        self.count = min(self.count + 1, self.history)
+        # o texto do overlay é refeito só de tempos em tempos
+        if self.overlay and self.index % 15 == 0:
+            self.overlay_surface = None
+
+    def get_samples(self, stage=None):
+        """Amostras em ordem cronológica, em milissegundos; stage None devolve o quadro inteiro"""
+        samples = self.frame_samples if stage is None else self.samples[stage]
+        if self.count < self.history:
+            ordered = samples[:self.count]
+        else:
+            ordered = np.roll(samples, -self.index)
+        return ordered / 1e6
+
+    def get_histogram(self, stage=None, bins=20):
+        return np.histogram(self.get_samples(stage), bins=bins)
+
+    def get_stats(self):
+        stats = {}
+        for stage in self.stages + [None]:
+            samples = self.get_samples(stage)
+            if not samples.size:
+                continue
+            stats[stage or 'frame'] = {
+                'mean': float(samples.mean()),
+                'p50': float(np.percentile(samples, 50)),
+                'p95': float(np.percentile(samples, 95)),
+                'p99': float(np.percentile(samples, 99)),
+                'max': float(samples.max()),
+            }
+        return stats
+
+    def dump(self, path):
+        """Salva o histórico em CSV (uma linha por quadro) ou JSON, conforme a extensão do arquivo"""
+        if path.endswith('.csv'):
+            columns = [self.get_samples(stage) for stage in self.stages] + [self.get_samples()]
+            with open(path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(self.stages + ['frame'])
+                writer.writerows(zip(*(column.tolist() for column in columns)))
+        else:
+            with open(path, 'w') as file:
+                json.dump({
+                    'frames': self.count,
+                    'stats_ms': self.get_stats(),
+                    'totals_ms': {stage: total / 1e6 for stage, total in self.totals.items()},
+                }, file, indent=2)
+
+    def draw_overlay(self, screen):
+        if not self.overlay:
+            return
+        if self.overlay_surface is None:
+            self.overlay_surface = self.render_overlay()
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 10, 10))
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pg.font.SysFont('monospace', 18)
+        lines = [f"{name:<16} {values['mean']:6.2f} {values['p95']:6.2f} {values['max']:6.2f}"
+                 for name, values in self.get_stats().items()]
+        lines.insert(0, f"{'ms':<16} {'media':>6} {'p95':>6} {'max':>6}")
+        texts = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        surface = pg.Surface((max(text.get_width() for text in texts) + 20, 22 * len(texts) + 10))
+        surface.set_alpha(200)
+        for i, text in enumerate(texts):
+            surface.blit(text, (10, 5 + 22 * i))
+        return surface
@@ -1,40 +1,106 @@
 from settings import *
 import pygame as pg
+import numpy as np
 import math
+from cache import SurfaceCache
 
 class RayCasting:
     def __init__(self, game):
         self.game = game
+        self.config = game.render_config
+        self.config_revision = None
         self.raycast_result = []
-        self.objects_to_render = []
+        self.render_queue = self.game.object_renderer.render_queue
         self.textures = self.game.object_renderer.wall_textures
+        self.column_cache = SurfaceCache(WALL_COLUMN_CACHE_MAX_BYTES)
+        self.check_config()
+        self.raycasters = {
+            'python': self.raycast_python,
+            'numpy': self.raycast_numpy,
+        }
+        self.raycaster = RAYCASTER
+
+    def check_config(self):
+        """Acompanha a resolução e o número de raios atuais da RenderConfig"""
+        config = self.config
+        if config.revision == self.config_revision:
+            return
+        self.config_revision = config.revision
+        num_rays = config.num_rays
+        # resultados do último raycast em arrays, um valor por raio
+        self.ray_depths = np.zeros(num_rays)
+        self.ray_proj_heights = np.zeros(num_rays)
+        self.ray_textures = np.ones(num_rays, dtype=np.int64)
+        self.ray_offsets = np.zeros(num_rays)
+        # profundidade da parede em cada coluna da visão, agrupada por raio (cada raio cobre config.scale colunas)
+        self.z_buffer = self.ray_depths
+        self.raycast_result = []
+        self.render_queue.resize(num_rays)
+        # as colunas guardadas têm a largura e as alturas da configuração anterior
+        self.column_cache.clear()
+
+    def get_wall_column(self, texture, column, height, span):
+        scale = self.config.scale
+        if span == TEXTURE_SIZE:
+            wall_column = self.textures[texture].subsurface(column, 0, scale, TEXTURE_SIZE)
+        else:
+            # parede mais alta que a tela: só a faixa central visível da textura é escalada
+            wall_column = self.textures[texture].subsurface(column, HALF_TEXTURE_SIZE - span // 2, scale, span)
+        return pg.transform.scale(wall_column, (scale, height))
 
     def get_objects_to_render(self):
-        self.objects_to_render = []
+        cache = self.column_cache
+        scale, screen_height, half_height = self.config.scale, self.config.height, self.config.half_height
         for ray, values in enumerate(self.raycast_result):
             depth, proj_height, texture, offset = values
-            
-            if proj_height < HEIGHT:
-                wall_column = self.textures[texture].subsurface(offset * (TEXTURE_SIZE - SCALE), 0, SCALE, TEXTURE_SIZE)
-                wall_column = pg.transform.scale(wall_column, (SCALE, proj_height))
-                wall_pos = (ray * SCALE, HALF_HEIGHT - proj_height // 2)
+
+            # quantiza a coluna da textura e a altura projetada para reaproveitar colunas já escaladas
+            column = int(offset * (TEXTURE_SIZE - scale)) // WALL_COLUMN_TEXEL_STEP * WALL_COLUMN_TEXEL_STEP
+            height = max(int(proj_height) // WALL_COLUMN_HEIGHT_STEP * WALL_COLUMN_HEIGHT_STEP, 1)
+
+            if height < screen_height:
+                span = TEXTURE_SIZE
+                wall_pos = (ray * scale, half_height - height // 2)
             else:
-                texture_height = TEXTURE_SIZE * HEIGHT / proj_height
-                wall_column = self.textures[texture].subsurface(offset * (TEXTURE_SIZE - SCALE), HALF_TEXTURE_SIZE - texture_height // 2, SCALE, texture_height)
-                wall_column = pg.transform.scale(wall_column, (SCALE, HEIGHT))
-                wall_pos = (ray * SCALE, 0)
+                # cortada pela tela, a coluna depende só dos texels visíveis: no máximo TEXTURE_SIZE
+                # entradas por coluna de textura, por mais perto que o jogador chegue da parede
+                height = screen_height
+                span = max(int(TEXTURE_SIZE * screen_height / proj_height), 1)
+                wall_pos = (ray * scale, 0)
 
-            self.objects_to_render.append((depth, wall_pos, wall_column))
+            key = (texture, column, height, span)
+            wall_column = cache.get(key)
+            if wall_column is None:
+                wall_column = self.get_wall_column(texture, column, height, span)
+                cache.put(key, wall_column)
+
+            self.render_queue.submit_wall(depth, wall_pos, wall_column)
 
     def raycast(self):
+        self.raycasters[self.raycaster]()
+        self.z_buffer = self.ray_depths
+
+    def get_visible_runs(self, left, right, depth):
+        """Faixas [início, fim) das colunas da visão entre left e right em que depth fica à frente das paredes"""
+        scale = self.config.scale
+        first, last = max(left, 0), min(right, self.config.num_rays * scale)
+        if first >= last:
+            return []
+        visible = depth < self.z_buffer[np.arange(first, last) // scale]
+        edges = np.flatnonzero(np.diff(visible, prepend=False, append=False)) + first
+        return edges.reshape(-1, 2).tolist()
+
+    def raycast_python(self):
         self.raycast_result = []
+        config = self.config
+        cells, cols, rows = self.game.map.cells, self.game.map.cols, self.game.map.rows
         ox, oy = self.game.player.pos
         x_map, y_map = self.game.player.map_pos
 
         texture_vert, texture_hor = 1, 1
 
         ray_angle = self.game.player.angle - HALF_FOV + 0.0001
-        for ray in range(NUM_RAYS):
+        for ray in range(config.num_rays):
             ray_angle_sin = math.sin(ray_angle)
             ray_angle_cos = math.cos(ray_angle)
 
@@ -48,9 +114,9 @@ class RayCasting:
             dx = delta_depth * ray_angle_cos
 
             for i in range(MAX_DEPTH):
-                tile_hor = int(x_hor), int(y_hor)
-                if tile_hor in self.game.map.worldmap:
-                    texture_hor = self.game.map.worldmap[tile_hor]
+                tile_x, tile_y = int(x_hor), int(y_hor)
+                if 0 <= tile_x < cols and 0 <= tile_y < rows and cells[tile_y * cols + tile_x]:
+                    texture_hor = cells[tile_y * cols + tile_x]
                     break
                 x_hor += dx
                 y_hor += dy
@@ -66,9 +132,9 @@ class RayCasting:
             dy = delta_depth * ray_angle_sin
 
             for i in range(MAX_DEPTH):
-                tile_vert = int(x_vert), int(y_vert)
-                if tile_vert in self.game.map.worldmap:
-                    texture_vert = self.game.map.worldmap[tile_vert]
+                tile_x, tile_y = int(x_vert), int(y_vert)
+                if 0 <= tile_x < cols and 0 <= tile_y < rows and cells[tile_y * cols + tile_x]:
+                    texture_vert = cells[tile_y * cols + tile_x]
                     break
                 x_vert += dx
                 y_vert += dy
@@ -91,13 +157,112 @@ class RayCasting:
             # corrige a profundidade para a inclinação do jogador
             depth *= math.cos(self.game.player.angle - ray_angle)
 
-            proj_height = SCREEN_DIST / (depth + 0.0001)
+            proj_height = config.screen_dist / (depth + 0.0001)
 
             self.raycast_result.append((depth, proj_height, texture, offset))
 
-            ray_angle += DELTA_ANGLE
+            ray_angle += config.delta_angle
+
+        depths, proj_heights, textures, offsets = zip(*self.raycast_result)
+        self.ray_depths, self.ray_proj_heights = np.array(depths), np.array(proj_heights)
+        self.ray_textures, self.ray_offsets = np.array(textures), np.array(offsets)
             
 
+    def march(self, x, y, depth, dx, dy, delta_depth):
+        # avança todos os raios em conjunto; cada raio sai da máscara ativa ao encontrar uma parede
+        get_tiles = self.game.map.get_tiles
+        texture = np.ones(x.shape, dtype=np.int64)
+        active = np.arange(x.size)
+        for i in range(MAX_DEPTH):
+            tiles = get_tiles(x[active], y[active])
+            hit = tiles > 0
+            texture[active[hit]] = tiles[hit]
+            active = active[~hit]
+            if not active.size:
+                break
+            x[active] += dx[active]
+            y[active] += dy[active]
+            depth[active] += delta_depth[active]
+        return texture
+
+    def cast_rays(self, ox, oy, ray_angles):
+        x_map, y_map = int(ox), int(oy)
+        sin_a = np.sin(ray_angles)
+        cos_a = np.cos(ray_angles)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # verifica as colisões horizontais
+            dy = np.where(sin_a > 0, 1.0, -1.0)
+            y_hor = np.where(sin_a > 0, y_map + 1, y_map - 0.000001)
+
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+
+            delta_depth = dy / sin_a
+            dx = delta_depth * cos_a
+
+            texture_hor = self.march(x_hor, y_hor, depth_hor, dx, dy, delta_depth)
+
+            # verifica as colisões verticais
+            dx = np.where(cos_a > 0, 1.0, -1.0)
+            x_vert = np.where(cos_a > 0, x_map + 1, x_map - 0.000001)
+
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+
+            delta_depth = dx / cos_a
+            dy = delta_depth * sin_a
+
+            texture_vert = self.march(x_vert, y_vert, depth_vert, dx, dy, delta_depth)
+
+        vert = depth_vert < depth_hor
+        depth = np.where(vert, depth_vert, depth_hor)
+        texture = np.where(vert, texture_vert, texture_hor)
+        offset_vert = np.where(cos_a > 0, y_vert % 1, 1 - y_vert % 1)
+        offset_hor = np.where(sin_a > 0, x_hor % 1, 1 - x_hor % 1)
+        offset = np.where(vert, offset_vert, offset_hor)
+        return depth, texture, offset
+
+    def raycast_numpy(self):
+        config = self.config
+        ox, oy = self.game.player.pos
+        angle = self.game.player.angle
+        ray_angles = angle - HALF_FOV + 0.0001 + np.arange(config.num_rays) * config.delta_angle
+
+        # cada faixa de raios é lançada à parte e escreve só no seu trecho dos arrays
+        num_rays = config.num_rays
+        depth, proj_height, offset = np.empty(num_rays), np.empty(num_rays), np.empty(num_rays)
+        texture = np.empty(num_rays, dtype=np.int64)
+
+        def cast_strip(start, end):
+            strip_angles = ray_angles[start:end]
+            strip_depth, texture[start:end], offset[start:end] = self.cast_rays(ox, oy, strip_angles)
+            # corrige a profundidade para a inclinação do jogador
+            strip_depth *= np.cos(angle - strip_angles)
+            depth[start:end] = strip_depth
+            proj_height[start:end] = config.screen_dist / (strip_depth + 0.0001)
+
+        self.game.strip_pool.run(cast_strip, num_rays)
+
+        self.ray_depths, self.ray_proj_heights, self.ray_textures, self.ray_offsets = depth, proj_height, texture, offset
+        self.raycast_result = list(zip(depth.tolist(), proj_height.tolist(), texture.tolist(), offset.tolist()))
+
+    def compare_raycasters(self):
+        """Executa os dois raycasters na pose atual e retorna as maiores divergências"""
+        self.raycast_python()
+        reference = self.raycast_result
+        self.raycast_numpy()
+        result = self.raycast_result
+        return {
+            'max_depth_error': max(abs(a[0] - b[0]) for a, b in zip(reference, result)),
+            'max_offset_error': max(abs(a[3] - b[3]) for a, b in zip(reference, result)),
+            'texture_mismatches': sum(a[2] != b[2] for a, b in zip(reference, result)),
+        }
+
     def update(self):
+        self.check_config()
         self.raycast()
-        self.get_objects_to_render()
\ No newline at end of file
+        self.render_queue.clear()
+        # no renderizador por surfarray as paredes são escritas direto na tela, sem colunas avulsas
+        if self.game.object_renderer.wall_renderer == 'blit':
+            self.get_objects_to_render()
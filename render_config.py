@@ -0,0 +1,85 @@
+import math
+import statistics
+from collections import deque
+
+from settings import *
+
+
+class RenderConfig:
+    """Parâmetros da visão 3D que podem mudar com o jogo rodando.
+
+    A visão é desenhada em width x height e ampliada para a janela; cada raio cobre scale colunas
+    da visão. Quem guarda dados que dependem desses valores compara revision com a do último uso.
+    """
+    def __init__(self, window_size=RESOLUTION, levels=QUALITY_LEVELS, level=0):
+        self.window_size = window_size
+        self.levels = levels
+        self.revision = 0
+        self.set_level(level)
+
+    def set_level(self, level):
+        level = min(max(level, 0), len(self.levels) - 1)
+        render_scale, ray_width = self.levels[level]
+        window_width, window_height = self.window_size
+        self.level = level
+        self.scale = ray_width
+        self.num_rays = max(int(window_width * render_scale) // ray_width, 1)
+        # a largura é múltipla da largura do raio, para os raios cobrirem a visão inteira
+        self.width = self.num_rays * self.scale
+        self.height = round(window_height * self.width / window_width)
+        self.resolution = self.width, self.height
+        self.half_width, self.half_height = self.width // 2, self.height // 2
+        self.half_num_rays = self.num_rays // 2
+        self.delta_angle = FOV / self.num_rays
+        self.screen_dist = self.half_width / math.tan(HALF_FOV)
+        self.revision += 1
+
+    @property
+    def upscaled(self):
+        return self.resolution != tuple(self.window_size)
+
+    def get_report(self):
+        return {
+            'level': self.level,
+            'resolution': list(self.resolution),
+            'num_rays': self.num_rays,
+            'ray_width': self.scale,
+        }
+
+
+class QualityController:
+    """Ajusta o nível de qualidade da RenderConfig pelo tempo dos quadros.
+
+    Com a mediana da janela de quadros acima de QUALITY_DOWNGRADE_LOAD do orçamento (1000 / FPS ms),
+    cai um nível; abaixo de QUALITY_UPGRADE_LOAD, sobe um. Depois de cada troca a janela recomeça
+    e espera QUALITY_COOLDOWN quadros, para o novo nível ser medido antes da próxima decisão.
+    """
+    def __init__(self, config, target_fps=FPS, window=QUALITY_WINDOW, enabled=DYNAMIC_QUALITY):
+        self.config = config
+        self.budget = 1000 / target_fps
+        self.frame_times = deque(maxlen=window)
+        self.enabled = enabled
+        self.cooldown = 0
+        self.changes = 0
+
+    def update(self, frame_ms):
+        if not self.enabled:
+            return
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+        # a mediana ignora picos isolados, como um asset carregado sob demanda
+        load = statistics.median(self.frame_times) / self.budget
+        if load > QUALITY_DOWNGRADE_LOAD and self.config.level < len(self.config.levels) - 1:
+            self.set_level(self.config.level + 1)
+        elif load < QUALITY_UPGRADE_LOAD and self.config.level > 0:
+            self.set_level(self.config.level - 1)
+
+    def set_level(self, level):
+        self.config.set_level(level)
+        self.frame_times.clear()
+        self.cooldown = QUALITY_COOLDOWN
+        self.changes += 1
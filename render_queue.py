@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class RenderQueue:
+    """Fila de renderização com armazenamento pré-alocado.
+
+    As colunas de parede nunca se sobrepõem entre si, então não precisam ser ordenadas:
+    só os poucos sprites são ordenados por profundidade e intercalados com as paredes.
+    """
+    def __init__(self, wall_capacity, sprite_capacity=64):
+        self.wall_depths = np.zeros(wall_capacity)
+        self.wall_positions = [None] * wall_capacity
+        self.wall_images = [None] * wall_capacity
+        self.wall_count = 0
+
+        self.sprite_depths = [0.0] * sprite_capacity
+        self.sprite_positions = [None] * sprite_capacity
+        self.sprite_images = [None] * sprite_capacity
+        self.sprite_count = 0
+
+    def resize(self, wall_capacity):
+        """Troca a capacidade de paredes quando muda o número de raios; a fila precisa estar vazia"""
+        self.wall_depths = np.zeros(wall_capacity)
+        self.wall_positions = [None] * wall_capacity
+        self.wall_images = [None] * wall_capacity
+        self.wall_count = 0
+
+    def clear(self):
+        self.wall_count = 0
+        self.sprite_count = 0
+
+    def submit_wall(self, depth, pos, image):
+        i = self.wall_count
+        self.wall_depths[i] = depth
+        self.wall_positions[i] = pos
+        self.wall_images[i] = image
+        self.wall_count = i + 1
+
+    def submit_sprite(self, depth, pos, image):
+        i = self.sprite_count
+        if i == len(self.sprite_depths):
+            self.sprite_depths.extend([0.0] * i)
+            self.sprite_positions.extend([None] * i)
+            self.sprite_images.extend([None] * i)
+        self.sprite_depths[i] = depth
+        self.sprite_positions[i] = pos
+        self.sprite_images[i] = image
+        self.sprite_count = i + 1
+
+    def draw(self, screen):
+        walls = self.wall_count
+        wall_images, wall_positions = self.wall_images, self.wall_positions
+        if not self.sprite_count:
+            screen.blits(zip(wall_images[:walls], wall_positions[:walls]), doreturn=False)
+            return
+
+        # sprites do mais distante para o mais próximo
+        order = sorted(range(self.sprite_count), key=self.sprite_depths.__getitem__, reverse=True)
+        sprite_depths = np.array([self.sprite_depths[i] for i in order])
+
+        # cada parede entra depois de todos os sprites mais distantes que ela
+        slots = np.searchsorted(-sprite_depths, -self.wall_depths[:walls])
+        for slot, i in enumerate(order):
+            screen.blits([(wall_images[j], wall_positions[j]) for j in np.flatnonzero(slots == slot)], doreturn=False)
+            screen.blit(self.sprite_images[i], self.sprite_positions[i])
+        screen.blits([(wall_images[j], wall_positions[j]) for j in np.flatnonzero(slots == len(order))], doreturn=False)
@@ -1,4 +1,5 @@
 import math
+import pygame as pg
 
 WIDTH = 1400
 HEIGHT = 900
@@ -9,6 +10,43 @@ RESOLUTION = (WIDTH, HEIGHT)
 
 FPS = 70
 
+# simulação em passo fixo, independente da taxa de quadros da renderização
+TICK_RATE = 70
+TICK_TIME = 1000 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5
+GLOBAL_TRIGGER_TIME = 40
+
+# instrumentação por etapa do quadro; a tecla alterna o overlay e o histórico é salvo ao sair
+PROFILER_ENABLED = False
+# 'floor' é medido dentro de 'object_renderer' e também entra no tempo dele
+PROFILER_STAGES = ('events', 'player', 'object_handler', 'weapon', 'raycasting', 'sprites', 'object_renderer', 'floor', 'weapon_draw', 'flip')
+PROFILER_HISTORY = 600
+PROFILER_OVERLAY_KEY = pg.K_F3
+PROFILER_DUMP_PATH = 'profile.json'  # .json ou .csv; None para não salvar
+
+# 'flow_field' usa o grafo plano do mapa inteiro, 'hierarchical' o HPA* por clusters e 'auto'
+# escolhe o hierárquico quando o mapa tem ao menos HPA_MIN_CELLS células
+PATHFINDING_MODE = 'auto'
+HPA_CLUSTER_SIZE = 16
+HPA_MIN_CELLS = 128 * 128
+# permite diagonais que raspam na quina de uma parede; desligado, a diagonal exige as duas retas livres
+NAV_CORNER_CUTTING = False
+
+# tamanho da célula do índice espacial dos NPCs
+SPATIAL_CELL_SIZE = 4
+
+# carregamento de assets: threads do pool, pastas decodificadas já na inicialização e relatório de tempos
+ASSET_WORKERS = 8
+ASSET_PRELOAD_DIRS = ('textures', 'sprites', 'sound')
+ASSET_LAZY_DIRS = ('death',)  # pastas que o preload não decodifica; o clipe de morte abre no primeiro uso
+ASSET_REPORT = True
+ASSET_CACHE_PATH = 'assets.cache'  # imagens já escaladas em disco; None desliga o cache
+
+# nível em arquivo (ver level.py); None usa o mapa embutido em map.py. A sidecar '<nível>.bin' guarda a
+# grade, as máscaras de navegação e os tiles livres já calculados e é mapeada em memória no carregamento
+LEVEL_PATH = None
+LEVEL_SIDECAR = True
+
 PLAYER_POS = 1.5, 5
 PLAYER_ANGLE = 0
 PLAYER_SPEED = 0.004
@@ -22,6 +60,14 @@ MOUSE_BORDER_LEFT = 100
 MOUSE_BORDER_RIGHT = WIDTH - MOUSE_BORDER_LEFT
 
 FLOOR_COLOR = (30, 30, 30)
+# piso e teto texturizados, projetados por pixel com NumPy (ver floor_caster.py). FLOOR_TEXTURE None
+# mantém o chão liso em FLOOR_COLOR e CEILING_TEXTURE None mantém o céu. Com FLOOR_CAST_STEP > 1 cada
+# texel cobre um bloco step x step de pixels, o que limita o custo a (largura / step) * (altura / 2 / step)
+# texels por quadro. Desligado por padrão enquanto o jogo não tem textura própria de piso; custa ~2.3 ms
+# por quadro com step 2 (medido com benchmark.py open_floor --floor)
+FLOOR_TEXTURE = None
+CEILING_TEXTURE = None
+FLOOR_CAST_STEP = 2
 
 FOV = math.pi / 3
 HALF_FOV = FOV / 2
@@ -29,9 +75,41 @@ NUM_RAYS = WIDTH // 2
 HALF_NUM_RAYS = NUM_RAYS // 2
 DELTA_ANGLE = FOV / NUM_RAYS
 MAX_DEPTH = 50
+RAYCASTER = 'numpy'  # 'python' | 'numpy'
 
 SCREEN_DIST = HALF_WIDTH / math.tan(HALF_FOV)
 SCALE = WIDTH // NUM_RAYS
 
+# qualidade dinâmica: a visão 3D é desenhada numa resolução interna e ampliada para a janela. Cada
+# nível é (fração da largura da janela, colunas de pixel por raio), do melhor para o pior; o primeiro
+# equivale a WIDTH, HEIGHT e NUM_RAYS. O controlador desce um nível quando a mediana do tempo de
+# quadro passa de QUALITY_DOWNGRADE_LOAD do orçamento de 1000 / FPS ms e sobe abaixo de QUALITY_UPGRADE_LOAD
+QUALITY_LEVELS = ((1.0, 2), (0.85, 2), (0.75, 2), (0.75, 3), (0.6, 3), (0.5, 4))
+DYNAMIC_QUALITY = True
+QUALITY_WINDOW = 30  # quadros considerados em cada decisão
+QUALITY_DOWNGRADE_LOAD = 0.95
+QUALITY_UPGRADE_LOAD = 0.6
+QUALITY_COOLDOWN = 60  # quadros ignorados depois de cada troca de nível
+
 TEXTURE_SIZE = 256
-HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
\ No newline at end of file
+HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
+
+WALL_RENDERER = 'blit'  # 'blit' | 'surfarray'
+# threads que fazem o raycast e, no renderizador por surfarray, as colunas de parede em faixas
+# verticais da visão; 1 roda tudo na thread principal. O resultado é o mesmo com qualquer valor
+RAYCAST_WORKERS = 1
+
+# cache das colunas de parede do renderizador 'blit'. Um acerto custa ~2 us por raio e uma falta ~8 us;
+# com passo de texel 2 (a largura de um raio) a taxa de acerto vai de ~30-45% para ~45-65% nos cenários
+# do benchmark. 64 MB ganha pouco mais, 16 MB já perde boa parte do ganho
+WALL_COLUMN_CACHE_MAX_BYTES = 32 * 1024 * 1024
+WALL_COLUMN_TEXEL_STEP = 2  # quantização da coluna da textura, em texels
+WALL_COLUMN_HEIGHT_STEP = 2  # quantização da altura projetada, em pixels
+
+SPRITE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# (altura limite, passo) em pixels: a altura projetada de um sprite é quantizada pelo passo da primeira faixa que a contém
+SPRITE_SIZE_BUCKETS = ((128, 1), (512, 2), (1024, 4), (2048, 8))
+# sprites mais perto que isso não são desenhados, mas continuam na mira do tiro
+SPRITE_NEAR_DIST = 0.5
+# limite da distância usada na projeção, para o tamanho de um sprite colado no jogador não explodir
+SPRITE_MIN_PROJ_DIST = 0.01
\ No newline at end of file
@@ -6,12 +6,14 @@ class Sound:
         self.game = game
         pg.mixer.init()
         self.path = 'sound/'
-        self.shotgun = pg.mixer.Sound(self.path + 'shotgun.wav')
-        self.npc_pain = pg.mixer.Sound(self.path + 'npc_pain.wav')
-        self.npc_death = pg.mixer.Sound(self.path + 'npc_death.wav')
-        self.npc_shot = pg.mixer.Sound(self.path + 'npc_attack.wav')
+        load_sound = game.assets.load_sound
+        self.shotgun = load_sound(self.path + 'shotgun.wav').get()
+        self.npc_pain = load_sound(self.path + 'npc_pain.wav').get()
+        self.npc_death = load_sound(self.path + 'npc_death.wav').get()
+        self.npc_shot = load_sound(self.path + 'npc_attack.wav').get()
         self.npc_shot.set_volume(0.2)
         self.shotgun.set_volume(0.2)
-        self.player_pain = pg.mixer.Sound(self.path + 'player_pain.wav')
-        self.theme = pg.mixer.music.load(self.path + 'theme.mp3')
+        self.player_pain = load_sound(self.path + 'player_pain.wav').get()
+        # a música só é aberta por theme.get(), na thread principal, quando for tocar
+        self.theme = game.assets.load_music(self.path + 'theme.mp3')
         pg.mixer.music.set_volume(0.3)
\ No newline at end of file
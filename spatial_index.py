@@ -0,0 +1,71 @@
+from settings import *
+
+
+class SpatialHash:
+    """Índice espacial em grade uniforme para objetos com x e y no mundo.
+
+    Cada objeto fica no balde da sua célula e é contado na ocupação do seu tile. As atualizações
+    são incrementais, então mover, inserir ou remover custa O(1) e as consultas só olham as
+    células próximas.
+    """
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.buckets = {}  # célula -> set de objetos
+        self.tiles = {}  # tile -> quantidade de objetos
+        self.positions = {}  # objeto -> (célula, tile)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, obj):
+        return obj in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def get_cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, obj):
+        cell, tile = self.get_cell(obj.x, obj.y), (int(obj.x), int(obj.y))
+        self.positions[obj] = cell, tile
+        self.buckets.setdefault(cell, set()).add(obj)
+        self.tiles[tile] = self.tiles.get(tile, 0) + 1
+
+    def remove(self, obj):
+        cell, tile = self.positions.pop(obj)
+        bucket = self.buckets[cell]
+        bucket.discard(obj)
+        if not bucket:
+            del self.buckets[cell]
+        self.tiles[tile] -= 1
+        if not self.tiles[tile]:
+            del self.tiles[tile]
+
+    def move(self, obj):
+        """Atualiza o objeto depois que ele andou; só mexe nas estruturas se trocou de célula ou tile"""
+        old = self.positions.get(obj)
+        if old is None:
+            self.insert(obj)
+            return
+        if old != (self.get_cell(obj.x, obj.y), (int(obj.x), int(obj.y))):
+            self.remove(obj)
+            self.insert(obj)
+
+    def is_occupied(self, tile):
+        return tile in self.tiles
+
+    def get_occupied_tiles(self):
+        return self.tiles.keys()
+
+    def query_radius(self, x, y, radius):
+        """Objetos a no máximo radius de (x, y)"""
+        (x0, y0), (x1, y1) = self.get_cell(x - radius, y - radius), self.get_cell(x + radius, y + radius)
+        radius_sq = radius * radius
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for obj in self.buckets.get((cx, cy), ()):
+                    if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= radius_sq:
+                        found.append(obj)
+        return found
@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+
+class AliasTable:
+    """Sorteio ponderado em O(1) pelo método de alias de Walker, montado com o algoritmo de Vose"""
+    def __init__(self, weights):
+        self.items = list(weights)
+        n = len(self.items)
+        total = sum(weights.values())
+        scaled = [weights[item] * n / total for item in self.items]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s], self.alias[s] = scaled[s], l
+            scaled[l] += scaled[s] - 1
+            (small if scaled[l] < 1 else large).append(l)
+        # o que sobra (só por arredondamento) fica com probabilidade 1
+
+    def sample(self):
+        i = random.randrange(len(self.items))
+        return self.items[i] if random.random() < self.prob[i] else self.items[self.alias[i]]
+
+
+class SpawnIndex:
+    """Tiles livres ao redor do jogador, separados em anéis de distância inteira.
+
+    Os deslocamentos do anel entre min_distance e max_distance são calculados uma vez; os tiles
+    válidos são refeitos só quando o jogador troca de tile ou o mapa muda. Como no sorteio polar
+    antigo, cada anel tem a mesma chance e o tile é uniforme dentro do anel.
+    """
+    def __init__(self, game, min_distance, max_distance):
+        self.game = game
+        self.key = None
+        self.rings = []
+        self.set_distances(min_distance, max_distance)
+
+    def set_distances(self, min_distance, max_distance):
+        r = int(max_distance) + 1
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+        distance = np.hypot(dx, dy)
+        keep = (distance >= min_distance) & (distance <= max_distance)
+        self.offsets = np.stack([dx[keep], dy[keep]], axis=1)
+        self.offset_rings = distance[keep].astype(np.int64)
+        self.key = None
+
+    def check_rings(self):
+        game_map = self.game.map
+        player_tile = self.game.player.map_pos
+        key = player_tile, game_map.revision
+        if key == self.key:
+            return
+        self.key = key
+
+        tiles = np.array(player_tile) + self.offsets
+        x, y = tiles[:, 0], tiles[:, 1]
+        # mesmo recorte de ObjectHandler.is_valid_spawn_position: longe da borda e fora das paredes
+        free = (x >= 1) & (x < game_map.cols - 1) & (y >= 1) & (y < game_map.rows - 1)
+        free[free] = ~game_map.are_walls(x[free], y[free])
+        tiles, rings = tiles[free], self.offset_rings[free]
+        self.rings = [tiles[rings == ring].tolist() for ring in np.unique(rings)]
+
+    def sample(self, is_valid):
+        """Sorteia o centro de um tile livre que passe em is_valid; None só se nenhum passar.
+
+        Tiles recusados saem do sorteio por troca com o último da lista, então cada um é testado
+        no máximo uma vez e a primeira tentativa quase sempre já serve.
+        """
+        self.check_rings()
+        pools = None
+        while True:
+            rings = pools if pools is not None else self.rings
+            if not rings:
+                return None
+            ring_index = random.randrange(len(rings))
+            ring = rings[ring_index]
+            tile_index = random.randrange(len(ring))
+            x, y = ring[tile_index]
+            if is_valid(x + 0.5, y + 0.5):
+                return x + 0.5, y + 0.5
+
+            if pools is None:
+                pools = [list(pool) for pool in self.rings]
+                ring = pools[ring_index]
+            ring[tile_index] = ring[-1]
+            ring.pop()
+            if not ring:
+                pools[ring_index] = pools[-1]
+                pools.pop()
@@ -2,34 +2,60 @@ import pygame as pg
 from settings import *
 import math
 import os
-from collections import deque
+from cache import SurfaceCache
 
 class SpriteObject:
+    # cache de imagens escaladas compartilhado por todos os sprites, chaveado por (quadro, altura quantizada)
+    scale_cache = SurfaceCache(SPRITE_CACHE_MAX_BYTES)
+
     def __init__(self, game, path='sprites/static_sprites/spikes_skull.png', pos=(10.5, 3.5), scale = 1.0, shift = 0.15):
         self.game = game
         self.player = game.player
         self.x, self.y = pos
-        self.image = pg.image.load(path).convert_alpha()
+        self.image = game.assets.load_image(path).get()
         self.IMAGE_WIDTH = self.image.get_width()
         self.IMAGE_HALF_WIDTH = self.image.get_width() // 2
         self.IMAGE_RATIO = self.IMAGE_WIDTH / self.image.get_height()
         self.dx, self.dy, self.theta, self.screen_x, self.dist, self.norm_dist = 0, 0, 0, 0, 1, 1
-        self.sprite_half_width = 0
+        self.proj_width, self.proj_height, self.sprite_half_width = 0, 0, 0
         self.SPRITE_SCALE = scale
         self.SPRITE_HEIGHT_SHIFT = shift
 
+    @staticmethod
+    def get_bucket_height(height):
+        # sprites maiores toleram passos maiores de quantização sem diferença visível
+        for limit, step in SPRITE_SIZE_BUCKETS:
+            if height < limit:
+                break
+        return max(int(height) // step * step, 1)
+
+    def get_scaled_image(self, proj_width, proj_height):
+        key = (self.image, proj_height)
+        image = self.scale_cache.get(key)
+        if image is None:
+            image = pg.transform.scale(self.image, (proj_width, proj_height))
+            self.scale_cache.put(key, image)
+        return image
+
     def get_sprite_projection(self):
-        proj = SCREEN_DIST / self.norm_dist * self.SPRITE_SCALE
-        proj_width, proj_height = proj * self.IMAGE_RATIO, proj
+        proj_width, proj_height = self.proj_width, self.proj_height
+        left = int(self.screen_x - self.sprite_half_width)
 
-        image = pg.transform.scale(self.image, (proj_width, proj_height))
+        # descarta as colunas escondidas atrás das paredes antes de escalar a imagem
+        runs = self.game.raycasting.get_visible_runs(left, left + proj_width, self.norm_dist)
+        if not runs:
+            return
 
-        self.sprite_half_width = proj_width // 2
+        image = self.get_scaled_image(proj_width, proj_height)
         height_shift = proj_height * self.SPRITE_HEIGHT_SHIFT
-        pos = self.screen_x - self.sprite_half_width, HALF_HEIGHT - proj_height // 2 + height_shift
-
-        self.game.raycasting.objects_to_render.append((self.norm_dist, pos, image))
+        top = self.game.render_config.half_height - proj_height // 2 + height_shift
 
+        for start, end in runs:
+            if end - start < proj_width:
+                visible_image = image.subsurface(start - left, 0, end - start, proj_height)
+            else:
+                visible_image = image
+            self.game.object_renderer.render_queue.submit_sprite(self.norm_dist, (start, top), visible_image)
 
     def get_sprite(self):
         dx = self.x - self.player.x
@@ -41,24 +67,44 @@ class SpriteObject:
         if (dx > 0 and self.player.angle > math.pi) or (dx < 0 and dy < 0):
             delta += math.tau
 
-        delta_rays = delta / DELTA_ANGLE
-        self.screen_x  = (HALF_NUM_RAYS + delta_rays) * SCALE
+        # posição e tamanho na visão 3D, na resolução interna atual
+        config = self.game.render_config
+        delta_rays = delta / config.delta_angle
+        self.screen_x  = (config.half_num_rays + delta_rays) * config.scale
 
         self.dist = math.hypot(dx, dy)
         self.norm_dist = self.dist * math.cos(delta)
-        if -self.IMAGE_HALF_WIDTH < self.screen_x < (WIDTH + self.IMAGE_HALF_WIDTH) and self.norm_dist > 0.5:
-            self.get_sprite_projection()
-
+        # na frente do jogador e horizontalmente na tela; o plano de corte do desenho fica em draw(),
+        # para o tiro ainda acertar um sprite colado no jogador
+        if -self.IMAGE_HALF_WIDTH < self.screen_x < (config.width + self.IMAGE_HALF_WIDTH) and self.norm_dist > 0:
+            proj = config.screen_dist / max(self.norm_dist, SPRITE_MIN_PROJ_DIST) * self.SPRITE_SCALE
+            self.proj_height = self.get_bucket_height(proj)
+            self.proj_width = int(self.proj_height * self.IMAGE_RATIO)
+            self.sprite_half_width = self.proj_width // 2
+            return True
+        return False
+
+    # a posição na tela é calculada na simulação (usada nos testes de tiro) e de novo ao desenhar
     def update(self):
         self.get_sprite()
 
+    def draw(self):
+        if self.get_sprite() and self.norm_dist > SPRITE_NEAR_DIST:
+            self.get_sprite_projection()
+
 class AnimatedSprite(SpriteObject):
+    # quadros de cada animação, carregados uma vez e compartilhados por todas as instâncias: pasta -> tupla
+    frame_store = {}
+
     def __init__(self, game, path='sprites/animated_sprites/red_torch/0.png', pos=(12.5, 3.5), scale = 1.0, shift = 0.15, animation_time = 120):
         super().__init__(game, path, pos, scale, shift)
         self.animation_time = animation_time
         self.path = path.rsplit('/', 1)[0]
         self.images = self.get_images(self.path)
-        self.animation_time_prev = pg.time.get_ticks()
+        # estado de animação da instância: a animação atual, o quadro dentro dela e o relógio
+        self.clip = self.images
+        self.frame_index = 0
+        self.animation_time_prev = self.game.get_ticks()
         self.animation_trigger = False
 
     def update(self):
@@ -67,21 +113,22 @@ class AnimatedSprite(SpriteObject):
         self.animate(self.images)
 
     def animate(self, images):
+        # trocar de animação recomeça do primeiro quadro
+        if images is not self.clip:
+            self.clip, self.frame_index = images, 0
         if self.animation_trigger:
-            images.rotate(-1)
-            self.image = images[0]
+            self.frame_index = (self.frame_index + 1) % len(images)
+            self.image = images[self.frame_index]
 
     def check_animation_time(self):
         self.animation_trigger = False
-        time_now = pg.time.get_ticks()
+        time_now = self.game.get_ticks()
         if time_now - self.animation_time_prev > self.animation_time:
             self.animation_time_prev = time_now
             self.animation_trigger = True
 
     def get_images(self, path):
-        images = deque()
-        file_names = sorted([f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))])
-        for file_name in file_names:
-            img = pg.image.load(path + '/' + file_name).convert_alpha()
-            images.append(img)
-        return images
\ No newline at end of file
+        frames = self.frame_store.get(path)
+        if frames is None:
+            frames = self.frame_store[path] = tuple(handle.get() for handle in self.game.assets.load_images(path))
+        return frames
\ No newline at end of file
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from settings import *
+
+# faixas menores que isso custam mais em despacho para o pool do que economizam
+MIN_STRIP_RAYS = 64
+
+
+class StripPool:
+    """Divide os raios da visão em faixas verticais contíguas e processa cada faixa numa thread.
+
+    Cada faixa escreve só na sua região dos arrays e da tela, e o trabalho pesado fica em kernels
+    NumPy que liberam o GIL. Com uma thread, as faixas viram uma só, executada na thread principal.
+    """
+    def __init__(self, workers=RAYCAST_WORKERS):
+        self.workers = max(workers, 1)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='strips') if self.workers > 1 else None
+
+    def get_strips(self, count):
+        """Intervalos [início, fim) de raios, um por faixa, cobrindo 0..count"""
+        strips = min(self.workers, max(count // MIN_STRIP_RAYS, 1))
+        bounds = [count * i // strips for i in range(strips + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def run(self, function, count):
+        """Chama function(início, fim) para cada faixa e espera todas terminarem"""
+        strips = self.get_strips(count)
+        if self.executor is None or len(strips) == 1:
+            return [function(start, end) for start, end in strips]
+        futures = [self.executor.submit(function, start, end) for start, end in strips]
+        # result() repassa para a thread principal a exceção de qualquer faixa
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class Visibility:
+    """Linha de visão do jogador até os NPCs, respondida para todos eles em um único passe vetorizado.
+
+    O raio vai do centro do tile do jogador ao centro do tile do NPC, então o resultado só depende
+    desse par de tiles: fica em cache até o jogador trocar de tile ou o mapa mudar.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.player_tile = None
+        self.map_revision = None
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def check_cache(self):
+        player_tile = self.game.player.map_pos
+        if player_tile != self.player_tile or self.game.map.revision != self.map_revision:
+            self.cache.clear()
+            self.player_tile = player_tile
+            self.map_revision = self.game.map.revision
+
+    def update(self, npcs):
+        """Calcula de uma vez a visibilidade dos tiles dos NPCs que ainda não estão no cache"""
+        self.check_cache()
+        missing = list({npc.map_pos for npc in npcs} - self.cache.keys())
+        if missing:
+            self.cast(missing)
+
+    def cast(self, tiles):
+        px, py = self.player_tile
+        ox, oy = px + 0.5, py + 0.5
+        targets = np.array(tiles, dtype=np.float64) + 0.5
+        dx, dy = targets[:, 0] - ox, targets[:, 1] - oy
+        # o desvio mínimo evita raios exatamente alinhados aos eixos, onde sin ou cos seriam zero
+        angles = np.arctan2(dy, dx) + 1e-6
+        wall_depth, _, _ = self.game.raycasting.cast_rays(ox, oy, angles)
+        visible = np.hypot(dx, dy) < wall_depth
+        for tile, value in zip(tiles, visible.tolist()):
+            self.cache[tile] = value or tile == self.player_tile
+        self.misses += len(tiles)
+
+    def can_see(self, tile):
+        self.check_cache()
+        visible = self.cache.get(tile)
+        if visible is None:
+            self.cast([tile])
+            return self.cache[tile]
+        self.hits += 1
+        return visible